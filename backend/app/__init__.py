@@ -1,13 +1,19 @@
 # backend/app/__init__.py
 import logging
-from flask import Flask
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from config import Config
 from app.extensions import db
+from app.cli import register_commands
+from app.passwords import PasswordHashingBusy
+from app.dbpool import InstrumentedQueuePool, instrument_engine
+from app import compression, logs, metrics, sqlstats
+from app.serialization import FastJSONProvider
 
 # Import your blueprints
 from app.routes.auth import auth_bp
@@ -15,32 +21,56 @@ from app.routes.companies import companies_bp
 from app.routes.services import services_bp
 from app.routes.regions import regions_bp
 from app.routes.users import users_bp # <--- NEW IMPORT
+from app.routes.admin import admin_bp
+from app.routes.notifications import notifications_bp
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(Config)
+    logs.init_app(app)
+
+    engine_options = dict(app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    if 'pool_size' in engine_options:
+        # Same QueuePool, plus checkout wait timing for /api/admin/pool
+        engine_options.setdefault('poolclass', InstrumentedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
 
     # Initialize extensions
     db.init_app(app)
+    with app.app_context():
+        instrument_engine(db.engine)
+    sqlstats.init_app(app)
+    metrics.init_app(app)
+    compression.init_app(app)
     migrate = Migrate(app, db)
     jwt = JWTManager(app)
     CORS(app)
 
-    # Configure logging for development
-    if app.debug:
-        logging.basicConfig(level=logging.DEBUG,
-                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    else:
-        logging.basicConfig(level=logging.INFO,
-                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
     # Register blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(companies_bp)
     app.register_blueprint(services_bp)
     app.register_blueprint(regions_bp)
     app.register_blueprint(users_bp) # <--- NEW REGISTRATION
-   
-    print(f"Blueprints registered: {app.blueprints.keys()}")
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(notifications_bp)
+
+    register_commands(app)
+
+    @app.errorhandler(PasswordHashingBusy)
+    def handle_password_hashing_busy(e):
+        response = jsonify({'error': 'Server is busy, please retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    @app.errorhandler(PoolTimeoutError)
+    def handle_pool_timeout(e):
+        logging.getLogger(__name__).warning("Database connection pool exhausted: %s", e)
+        response = jsonify({'error': 'Server is busy, please retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    logging.getLogger(__name__).debug("Blueprints registered: %s", ', '.join(app.blueprints))
 
     return app
@@ -0,0 +1,238 @@
+# backend/app/authz.py
+"""
+Shared authorization layer for all blueprints.
+
+Access tokens carry the user's role, username and company_id as claims (see create_user_token),
+so role_required authorizes the common request from the signed token alone. Tokens record the
+user's claims version, a per-user counter in `table_versions` (named `user_claims.<id>`) that
+changing the user's role, username or company, or deleting them, bumps in the same transaction.
+Each worker caches the versions it reads for AUTH_CLAIMS_CHECK_SECONDS: a request whose token
+carries the cached version needs no query at all. Once the versions differ, the user is loaded
+from the database (through a per-worker cache keyed on the version). The worker making a change
+drops its cached version at once; other workers notice it within AUTH_CLAIMS_CHECK_SECONDS.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import current_app, jsonify
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, jwt_required
+from sqlalchemy import event, inspect, update
+
+from .caching import get_versions
+from .extensions import db
+from .logs import role_check_sampler
+from .models import TableVersion, User
+
+logger = logging.getLogger(__name__)
+
+# Lightweight stand-in for the User row, passed to views as `current_user`.
+CurrentUser = namedtuple('CurrentUser', ['id', 'username', 'role', 'company_id'])
+
+
+def user_claims(user):
+    """
+    Claims embedded in every access token for `user`.
+    """
+    return {'role': user.role, 'username': user.username, 'company_id': user.company_id}
+
+
+def claims_version_name(user_id):
+    """
+    The table_versions name counting changes to `user_id`'s claims.
+    """
+    return f'user_claims.{user_id}'
+
+
+def create_user_token(user):
+    """
+    Issues an access token whose claims let role_required skip loading the user.
+    `claims_version` is the user's claims version when the token was issued.
+    """
+    if user.id in db.session.info.get(UserCache.NEW_USERS_KEY, ()):
+        version = 0  # Created in this transaction: nothing can have bumped it yet
+    else:
+        version, = get_versions(claims_version_name(user.id))
+    claims = dict(user_claims(user), claims_version=version)
+    return create_access_token(identity=str(user.id), additional_claims=claims)
+
+
+class UserCache:
+    """
+    Per-worker LRUs of users' claims versions, each kept for a given number of seconds, and of
+    CurrentUser snapshots. Each snapshot remembers the claims version it was loaded at and is
+    only served while the caller still sees that version.
+    """
+
+    # Users whose claims change in the current transaction, in Session.info
+    PENDING_KEY = 'user_claims_changed'
+    # Users inserted in the current transaction; no token can predate them
+    NEW_USERS_KEY = 'users_inserted'
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, entries, user_id, value):
+        with self._lock:
+            entries[user_id] = value
+            entries.move_to_end(user_id)
+            while len(entries) > self.max_size:
+                entries.popitem(last=False)
+
+    def claims_version(self, user_id, max_age, at_least=0):
+        """
+        `user_id`'s claims version, as read from the database at most `max_age` seconds ago.
+        A cached version older than `at_least` (seen in a token) is known to be stale and re-read.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry and entry[1] > now and entry[0] >= at_least:
+                self._versions.move_to_end(user_id)
+                return entry[0]
+        version, = get_versions(claims_version_name(user_id))
+        self._remember(self._versions, user_id, (version, now + max_age))
+        return version
+
+    def get(self, user_id, version):
+        """
+        CurrentUser for `user_id` at claims `version`, loaded from the database on a miss.
+        None if the user does not exist.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > now and entry[2] == version:
+                self._entries.move_to_end(user_id)
+                return entry[0]
+
+        user = db.session.get(User, user_id)
+        if not user:
+            return None
+        snapshot = CurrentUser(user.id, user.username, user.role, user.company_id)
+        self._remember(self._entries, user_id, (snapshot, now + self.ttl, version))
+        return snapshot
+
+    def invalidate(self, user_id):
+        """
+        Drops what this worker caches for the user and has the current transaction bump the
+        user's claims version when it flushes, so no worker keeps trusting older tokens.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._versions.pop(user_id, None)
+        db.session.info.setdefault(self.PENDING_KEY, set()).add(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User.role, 'set')
+@event.listens_for(User.username, 'set')
+@event.listens_for(User.company_id, 'set')
+def _invalidate_on_change(target, value, oldvalue, initiator):
+    # Only users that existed before this transaction can have tokens in circulation.
+    state = inspect(target)
+    if value != oldvalue and state.persistent and target.id not in state.session.info.get(UserCache.NEW_USERS_KEY, ()):
+        user_cache.invalidate(target.id)
+
+
+@event.listens_for(User, 'after_insert')
+def _remember_new_user(mapper, connection, target):
+    inspect(target).session.info.setdefault(UserCache.NEW_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(db.session, 'before_flush')
+def _bump_claims_versions(session, flush_context, instances):
+    # bump_version() flushes, which is not allowed here, so this updates the table directly.
+    changed = session.info.pop(UserCache.PENDING_KEY, set())
+    changed.update(obj.id for obj in session.deleted if isinstance(obj, User))
+    table = TableVersion.__table__
+    for user_id in sorted(changed):
+        name = claims_version_name(user_id)
+        result = session.execute(update(table).where(table.c.name == name).values(version=table.c.version + 1))
+        if result.rowcount == 0:
+            session.add(TableVersion(name=name, version=1))
+
+
+@event.listens_for(db.session, 'after_commit')
+@event.listens_for(db.session, 'after_rollback')
+def _forget_claims_changes(session):
+    session.info.pop(UserCache.PENDING_KEY, None)
+    session.info.pop(UserCache.NEW_USERS_KEY, None)
+
+
+def load_current_user():
+    """
+    Resolves the CurrentUser of the verified JWT in this request.
+    Returns (CurrentUser, None) or (None, error_response).
+    """
+    current_user_id_str = get_jwt_identity()
+    if current_user_id_str is None:
+        logger.error("role_required: JWT Identity is None. Token might be missing or invalid.")
+        return None, (jsonify({'msg': 'Authorization token missing or invalid'}), 401)
+
+    try:
+        current_user_id = int(current_user_id_str)
+    except (ValueError, TypeError):
+        logger.error("Invalid user ID in token: %s", current_user_id_str)
+        return None, (jsonify({'msg': 'Invalid user identity in token'}), 401)
+
+    claims = get_jwt()
+    token_version = claims.get('claims_version')
+    version = user_cache.claims_version(current_user_id, current_app.config['AUTH_CLAIMS_CHECK_SECONDS'],
+                                        at_least=token_version if isinstance(token_version, int) else 0)
+    if 'role' in claims and token_version == version:
+        return CurrentUser(current_user_id, claims.get('username'), claims['role'], claims.get('company_id')), None
+
+    user = user_cache.get(current_user_id, version)
+    if not user:
+        logger.error("User ID %s from token not found in DB.", current_user_id)
+        return None, (jsonify({'msg': 'User not found'}), 404)
+    return user, None
+
+
+def role_required(allowed_roles):
+    """
+    Decorator to restrict access to a route based on user roles (None allows every role).
+    Verifies the JWT itself and passes the caller to the view as the `current_user` keyword argument.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            user, error = load_current_user()
+            if error:
+                return error
+
+            if role_check_sampler() and logger.isEnabledFor(logging.INFO):
+                logger.info("Role Check: User '%s' (ID: %s) has role: '%s'. Allowed roles: %s",
+                            user.username, user.id, user.role, allowed_roles,
+                            extra={'sample_rate': role_check_sampler.rate})
+
+            if allowed_roles is not None and user.role not in allowed_roles:
+                logger.warning("Access Denied: User '%s' (role: %s) attempted to access restricted resource. Allowed roles: %s", user.username, user.role, allowed_roles)
+                return jsonify({'msg': 'Access Denied: Insufficient permissions'}), 403 # Forbidden
+
+            kwargs['current_user'] = user
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def login_required(fn):
+    """
+    role_required for views open to every signed-in user, whatever their role.
+    """
+    return role_required(None)(fn)
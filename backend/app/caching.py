@@ -0,0 +1,80 @@
+# backend/app/caching.py
+"""
+Conditional GET support for rarely changing data (regions, services, the companies directory).
+
+Every cacheable table has a row in `table_versions` that write handlers bump inside their own
+transaction. A GET derives a strong ETag from the versions it depends on plus the request path
+and query string, so a matching If-None-Match is answered with 304 after a single primary-key
+lookup, without loading any of the rows themselves. If-None-Match uses the weak comparison, so
+the weak ETags of compressed responses (app.compression) revalidate too. MessagePack responses
+(app.serialization) get ETags of their own.
+"""
+import hashlib
+from functools import wraps
+
+from flask import current_app, make_response, request
+from sqlalchemy import select, update
+
+from .extensions import db
+from .models import TableVersion
+from .serialization import msgpack_mimetype
+
+
+def get_versions(*names):
+    """
+    Current version of each table name, in order. Tables never written to are at version 0.
+    """
+    rows = dict(db.session.execute(
+        select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(names))
+    ).all())
+    return [rows.get(name, 0) for name in names]
+
+
+def bump_version(*names):
+    """
+    Marks tables as changed. Call before committing the write, so the bump commits with it.
+    """
+    for name in names:
+        result = db.session.execute(
+            update(TableVersion).where(TableVersion.name == name).values(version=TableVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            db.session.add(TableVersion(name=name, version=1))
+    db.session.flush()
+
+
+def compute_etag(names):
+    versions = get_versions(*names)
+    representation = f"{request.path}?{sorted(request.args.items(multi=True))}"
+    mimetype = msgpack_mimetype()
+    if mimetype:
+        # The MessagePack body is a different representation of the same data
+        representation += f";{mimetype}"
+    digest = hashlib.blake2s(representation.encode(), digest_size=8).hexdigest()
+    return '-'.join(f"{name}.{version}" for name, version in zip(names, versions)) + f"-{digest}"
+
+
+def _cache_control():
+    return f"public, max-age={current_app.config['REFERENCE_DATA_MAX_AGE']}, must-revalidate"
+
+
+def conditional(*names):
+    """
+    Decorator for GET views whose output only depends on the given tables.
+    Adds ETag and Cache-Control, and short-circuits to 304 when If-None-Match matches.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            etag = compute_etag(names)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = _cache_control()
+            return response
+        return wrapper
+    return decorator
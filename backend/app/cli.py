@@ -0,0 +1,67 @@
+# backend/app/cli.py
+"""
+`flask` CLI commands. Registered on the app in create_app().
+"""
+import click
+from flask.cli import with_appcontext
+
+from .extensions import db
+from . import search, seeding
+from .importer import DEFAULT_BATCH_SIZE, FORMATS, detect_format, import_companies
+
+
+@click.command('search-reindex')
+@with_appcontext
+def search_reindex_command():
+    """Create the company full-text search index if missing and rebuild it from scratch."""
+    search.create_index()
+    search.refresh_companies()
+    db.session.commit()
+    click.echo('Company search index rebuilt.')
+
+
+@click.command('import-companies')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True)
+@with_appcontext
+def import_companies_command(path, fmt, batch_size):
+    """Bulk import companies from a CSV or NDJSON file."""
+    fmt = fmt or detect_format(filename=path)
+    if fmt is None:
+        raise click.UsageError('Cannot tell the format from the file name; pass --format.')
+    with open(path, 'rb') as stream:
+        report = import_companies(stream, fmt, batch_size=batch_size)
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    click.echo(f"Imported {report['created']} companies, {report['failed']} rows failed.")
+
+
+@click.command('seed')
+@click.option('--companies', default=1000, show_default=True, help='Target number of seeded companies.')
+@click.option('--users', default=1000, show_default=True, help='Target number of seeded regular users.')
+@click.option('--regions', default=47, show_default=True)
+@click.option('--services', default=12, show_default=True)
+@click.option('--locations-per-region', default=5, show_default=True)
+@click.option('--seed', 'seed_value', default=42, show_default=True, help='Same seed, same data.')
+@click.option('--batch-size', default=10_000, show_default=True, help='Rows generated and committed per chunk.')
+@click.option('--workers', type=int, help='Generator processes (default: CPU count).')
+@click.option('--no-copy', is_flag=True, help='Use INSERTs instead of COPY on PostgreSQL.')
+@click.option('--admin-password', default='admin123', show_default=True, help='Used only if no "admin" user exists.')
+@with_appcontext
+def seed_command(companies, users, regions, services, locations_per_region, seed_value, batch_size, workers,
+                 no_copy, admin_password):
+    """Generate synthetic data, topping up what an earlier run with the same seed created."""
+    report = seeding.seed(
+        companies=companies, users=users, regions=regions, services=services,
+        locations_per_region=locations_per_region, seed=seed_value, batch_size=batch_size,
+        workers=workers, use_copy=not no_copy, admin_password=admin_password,
+    )
+    added = ', '.join(f'{count} {table}' for table, count in report.items()) or 'nothing'
+    click.echo(f'Seeding done; added {added}. Seeded logins use the password "{seeding.SEED_PASSWORD}".')
+
+
+def register_commands(app):
+    app.cli.add_command(search_reindex_command)
+    app.cli.add_command(import_companies_command)
+    app.cli.add_command(seed_command)
@@ -0,0 +1,154 @@
+# backend/app/compression.py
+"""
+Response compression: gzip, and brotli when the `brotli` package is installed.
+
+Responses are compressed when the client accepts an encoding, the mimetype is in
+COMPRESSION_MIMETYPES and the body is at least COMPRESSION_MIN_SIZE bytes; streamed responses are
+compressed on the fly. Responses carrying an ETag (the @conditional views) are compressed once:
+the compressed bytes are kept per (ETag, encoding) in a per-worker LRU bounded by
+COMPRESSION_CACHE_MAX_BYTES, since the ETag already changes whenever the body does. The ETag of
+a compressed response is marked weak, as the bytes differ from the identity representation.
+"""
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    @staticmethod
+    def compress(data, level):
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(data, compresslevel=level, mtime=0)
+
+    @staticmethod
+    def stream(chunks, level):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    @staticmethod
+    def compress(data, level):
+        return brotli.compress(data, quality=level)
+
+    @staticmethod
+    def stream(chunks, level):
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            data = compressor.process(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+# In order of preference when the client accepts several equally
+ENCODERS = {encoder.name: encoder for encoder in ([BrotliEncoder] if brotli else []) + [GzipEncoder]}
+
+
+class CompressedCache:
+    """
+    Per-worker LRU of compressed bodies keyed by (ETag, encoding), bounded by total size.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        # A single entry may not take more than a quarter of the budget
+        if len(data) * 4 > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+compressed_cache = CompressedCache(0)
+
+
+def choose_encoding():
+    """
+    The best encoding the client accepts, or None.
+    """
+    return request.accept_encodings.best_match(list(ENCODERS))
+
+
+def compress_response(response):
+    config = current_app.config
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.mimetype not in config['COMPRESSION_MIMETYPES']
+            or 'Content-Encoding' in response.headers or response.direct_passthrough):
+        return response
+
+    if not response.is_streamed and response.calculate_content_length() < config['COMPRESSION_MIN_SIZE']:
+        return response
+    response.vary.add('Accept-Encoding')
+    name = choose_encoding()
+    if name is None:
+        return response
+    encoder = ENCODERS[name]
+    level = config['COMPRESSION_LEVELS'][name]
+
+    if response.is_streamed:
+        response.response = encoder.stream(response.response, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        etag, weak = response.get_etag()
+        key = (etag, name) if etag and not weak else None
+        data = compressed_cache.get(key) if key else None
+        if data is None:
+            data = encoder.compress(response.get_data(), level)
+            if key:
+                compressed_cache.put(key, data)
+        response.set_data(data)
+    response.headers['Content-Encoding'] = name
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """
+    Compresses the responses of `app` (unless COMPRESSION_ENABLED is off).
+    """
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+    compressed_cache.max_bytes = app.config['COMPRESSION_CACHE_MAX_BYTES']
+    app.after_request(compress_response)
@@ -0,0 +1,47 @@
+# backend/app/cooperative.py
+"""
+Support for serving with gevent workers (GUNICORN_WORKER_CLASS=gevent, see gunicorn.conf.py).
+
+gevent's monkey patching makes sockets, locks and queues cooperative, but psycopg2 is a C
+extension that blocks inside libpq. patch_psycopg2() installs a wait callback so a greenlet
+waiting on Postgres yields to the others. CPU-bound password hashing is sent to native threads
+by app.passwords. Per-request state lives in Flask's contexts (contextvars), which are local to
+each greenlet, and Flask-SQLAlchemy scopes the database session to the application context.
+"""
+import sys
+
+
+def monkey_patched():
+    """
+    True when gevent has patched threading, i.e. inside a gevent worker.
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    return monkey is not None and monkey.is_module_patched('threading')
+
+
+def gevent_wait_callback(conn, timeout=None):
+    """
+    psycopg2 wait callback: polls the connection and parks the greenlet until its socket is ready.
+    """
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f'Bad result from poll: {state!r}')
+
+
+def patch_psycopg2():
+    """
+    Makes psycopg2 cooperative for the whole process. COPY (copy_expert) is unavailable afterwards.
+    """
+    from psycopg2 import extensions
+
+    extensions.set_wait_callback(gevent_wait_callback)
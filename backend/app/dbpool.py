@@ -0,0 +1,125 @@
+# backend/app/dbpool.py
+"""
+Connection pool telemetry for the current worker process.
+
+Pool events count connects, closes, invalidations, checkouts and checkins. When the engine uses
+a QueuePool, InstrumentedQueuePool also times how long each checkout waited for a free
+connection and counts checkouts that timed out. GET /api/admin/pool reports the numbers.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+from .metrics import DB_POOL_CHECKOUT_TIMEOUTS, DB_POOL_CHECKOUT_WAIT
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self.since = time.time()
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checkout_timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'since': self.since,
+                'connects': self.connects,
+                'closes': self.closes,
+                'invalidations': self.invalidations,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'checkout_timeouts': self.checkout_timeouts,
+                'checkout_wait_ms': {
+                    'total': round(self.wait_total * 1000, 3),
+                    'avg': round(self.wait_total * 1000 / self.waits, 3) if self.waits else 0.0,
+                    'max': round(self.wait_max * 1000, 3),
+                },
+            }
+
+
+pool_stats = PoolStats()
+
+if hasattr(os, 'register_at_fork'):
+    # Counters copied from the parent would be attributed to every worker
+    os.register_at_fork(after_in_child=pool_stats.reset)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records the time spent waiting for each connection checkout.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            waited = time.perf_counter() - started
+            pool_stats.record_wait(waited, timed_out=True)
+            DB_POOL_CHECKOUT_WAIT.observe(waited)
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        waited = time.perf_counter() - started
+        pool_stats.record_wait(waited)
+        DB_POOL_CHECKOUT_WAIT.observe(waited)
+        return connection
+
+
+def instrument_engine(engine):
+    """
+    Attaches the counting listeners to `engine`'s pool (and any pool it is recreated into).
+    """
+    for name, counter in (('connect', 'connects'), ('close', 'closes'), ('close_detached', 'closes'),
+                          ('invalidate', 'invalidations'), ('soft_invalidate', 'invalidations'),
+                          ('checkout', 'checkouts'), ('checkin', 'checkins')):
+        event.listen(engine, name, lambda *args, counter=counter: pool_stats.incr(counter))
+
+
+def pool_status(engine):
+    """
+    Live pool state plus this worker's counters.
+    """
+    pool = engine.pool
+    status = {
+        'pid': os.getpid(),
+        'pool_class': type(pool).__name__,
+        'status': pool.status(),
+    }
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    status['counters'] = pool_stats.snapshot()
+    return status
@@ -0,0 +1,98 @@
+# backend/app/facets.py
+"""
+Facet counts for the company directory filters: companies per status, per region and per service.
+
+All three groupings come from one UNION ALL of GROUP BY queries. Results are cached per worker,
+keyed by the filters, and stay valid while the 'companies', 'regions' and 'services' table
+versions are unchanged (every company, status and service-link write bumps 'companies').
+"""
+import threading
+import weakref
+from collections import OrderedDict
+
+from sqlalchemy import func, literal, null, select, union_all
+
+from .caching import get_versions
+from .extensions import db
+from .models import Company, Region, Service, company_service_association
+
+# Tables whose changes invalidate cached counts
+FACET_TABLES = ('companies', 'regions', 'services')
+
+
+def count_facets(criteria):
+    """
+    Runs the grouped aggregate for companies matching `criteria` (see routes.companies.company_filters).
+    Returns {'total', 'status': {status: count}, 'regions': [...], 'services': [...]}.
+    """
+    link = company_service_association.c
+    by_status = (
+        select(literal('status').label('facet'), Company.status.label('status'), null().label('id'),
+               null().label('name'), func.count().label('count'))
+        .where(*criteria)
+        .group_by(Company.status)
+    )
+    by_region = (
+        select(literal('region'), null(), Company.region_id, Region.name, func.count())
+        .select_from(Company)
+        .outerjoin(Region, Region.id == Company.region_id)
+        .where(*criteria)
+        .group_by(Company.region_id, Region.name)
+    )
+    by_service = (
+        select(literal('service'), null(), Service.id, Service.name, func.count())
+        .select_from(Company)
+        .join(company_service_association, link.company_id == Company.id)
+        .join(Service, Service.id == link.service_id)
+        .where(*criteria)
+        .group_by(Service.id, Service.name)
+    )
+
+    result = {'total': 0, 'status': {}, 'regions': [], 'services': []}
+    for facet, status, facet_id, name, count in db.session.execute(union_all(by_status, by_region, by_service)):
+        if facet == 'status':
+            result['status'][status] = count
+            result['total'] += count
+        elif facet == 'region':
+            result['regions'].append({'id': facet_id, 'name': name, 'count': count})
+        else:
+            result['services'].append({'id': facet_id, 'name': name, 'count': count})
+    result['regions'].sort(key=lambda r: (r['id'] is None, r['id']))
+    result['services'].sort(key=lambda s: s['id'])
+    return result
+
+
+class FacetCache:
+    """
+    Per-worker LRU of facet results, one map per engine, checked against the table versions.
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = weakref.WeakKeyDictionary()
+
+    def get(self, key, criteria):
+        engine = db.session.get_bind()
+        versions = tuple(get_versions(*FACET_TABLES))
+        with self._lock:
+            entries = self._entries.setdefault(engine, OrderedDict())
+            cached = entries.get(key)
+            if cached and cached[0] == versions:
+                entries.move_to_end(key)
+                return cached[1]
+
+        result = count_facets(criteria)
+        with self._lock:
+            entries[key] = (versions, result)
+            entries.move_to_end(key)
+            while len(entries) > self.max_size:
+                entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+facet_cache = FacetCache()
@@ -0,0 +1,199 @@
+# backend/app/geo.py
+"""
+"Which companies serve this point" lookups.
+
+A company serves the points within its service_radius_km of its base; companies without a
+service radius are matched within the radius the caller asks for. The search area is therefore
+the larger of that radius and the largest service radius of any located company.
+
+Coordinates are plain latitude/longitude columns so the schema is the same on every backend.
+On PostgreSQL with PostGIS, a functional GiST index over
+geography(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)) (created by migration) answers
+radius and nearest-first queries. Elsewhere (SQLite in development and tests, or PostgreSQL
+without PostGIS) a per-worker grid index over the company coordinates is used instead. The grid
+and the largest service radius are cached per worker and rebuilt whenever the LOCATIONS_VERSION
+table version changes. Writers bump that version, as well as 'companies', only when a company
+with coordinates is added or removed, or a company's coordinates, service radius or status
+(which lookups filter on) change, so other edits keep the caches.
+"""
+import logging
+import math
+import threading
+import weakref
+
+from sqlalchemy import func, select, text
+
+from .caching import get_versions
+from .extensions import db
+from .models import Company
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+# Must match the expression of ix_companies_geography exactly for the index to be used.
+_PG_POINT = "geography(ST_SetSRID(ST_MakePoint(companies.longitude, companies.latitude), 4326))"
+
+_postgis_engines = weakref.WeakKeyDictionary()
+
+# table_versions name covering what the per-worker location caches hold
+LOCATIONS_VERSION = 'company_locations'
+LOCATION_FIELDS = ('latitude', 'longitude', 'service_radius_km')
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid of (company_id, lat, lon, status, service_radius_km) entries.
+    A radius query visits only the cells overlapping the circle's bounding box.
+    """
+
+    def __init__(self, entries, cell_degrees=0.1):
+        self.cell_degrees = cell_degrees
+        self.size = 0
+        self.max_service_radius_km = 0
+        self.cells = {}
+        for entry in entries:
+            self.cells.setdefault(self._cell(entry[1], entry[2]), []).append(entry)
+            self.size += 1
+            if entry[4] is not None:
+                self.max_service_radius_km = max(self.max_service_radius_km, entry[4])
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lon / self.cell_degrees))
+
+    def _candidates(self, lat, lon, radius_km):
+        lat_span = radius_km / KM_PER_DEGREE
+        lon_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        if lon_span >= 180:
+            lon_span = 180
+        min_x, min_y = self._cell(max(lat - lat_span, -90), lon - lon_span)
+        max_x, max_y = self._cell(min(lat + lat_span, 90), lon + lon_span)
+        cell_count = (max_x - min_x + 1) * (max_y - min_y + 1)
+        if cell_count > len(self.cells):
+            # A huge radius touches more cells than exist: walk the populated ones instead.
+            for entries in self.cells.values():
+                yield from entries
+            return
+        # Longitudes past +/-180 wrap around the antimeridian
+        wrap = int(round(360 / self.cell_degrees))
+        columns = {(y + wrap // 2) % wrap - wrap // 2 for y in range(min_y, max_y + 1)}
+        for x in range(min_x, max_x + 1):
+            for y in columns:
+                yield from self.cells.get((x, y), ())
+
+    def nearby(self, lat, lon, radius_km, limit, status=None):
+        """
+        Up to `limit` (company_id, distance_km) pairs of companies serving (lat, lon), nearest
+        first: within their service radius, or `radius_km` for those without one.
+        """
+        found = []
+        search_km = max(radius_km, self.max_service_radius_km)
+        for company_id, c_lat, c_lon, c_status, c_radius in self._candidates(lat, lon, search_km):
+            if status and c_status != status:
+                continue
+            distance = haversine_km(lat, lon, c_lat, c_lon)
+            if distance <= (radius_km if c_radius is None else c_radius):
+                found.append((distance, company_id))
+        found.sort()
+        return [(company_id, distance) for distance, company_id in found[:limit]]
+
+
+class _LocationsCache:
+    """
+    A per-engine value computed from the company locations, rebuilt when LOCATIONS_VERSION changes.
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._lock = threading.Lock()
+        self._values = weakref.WeakKeyDictionary()
+
+    def get(self):
+        engine = db.session.get_bind()
+        (version,) = get_versions(LOCATIONS_VERSION)
+        cached = self._values.get(engine)
+        if cached and cached[0] == version:
+            return cached[1]
+        with self._lock:
+            cached = self._values.get(engine)
+            if cached and cached[0] == version:
+                return cached[1]
+            value = self._build(version)
+            self._values[engine] = (version, value)
+            return value
+
+
+def _build_grid_index(version):
+    rows = db.session.execute(
+        select(Company.id, Company.latitude, Company.longitude, Company.status, Company.service_radius_km)
+        .where(Company.latitude.isnot(None), Company.longitude.isnot(None))
+    ).all()
+    index = GridIndex(tuple(row) for row in rows)
+    logger.info("Rebuilt company grid index: %d located companies (version %s).", index.size, version)
+    return index
+
+
+def _max_service_radius_km(version):
+    return db.session.scalar(
+        select(func.max(Company.service_radius_km))
+        .where(Company.latitude.isnot(None), Company.longitude.isnot(None))
+    ) or 0
+
+
+grid_indexes = _LocationsCache(_build_grid_index)
+max_service_radii = _LocationsCache(_max_service_radius_km)
+
+
+def location_changed(company, location):
+    """
+    Whether applying `location` (as parsed from a request) moves `company` or its service area.
+    """
+    return any(getattr(company, field) != location.get(field, getattr(company, field)) for field in LOCATION_FIELDS)
+
+
+def postgis_available():
+    engine = db.session.get_bind()
+    if engine.dialect.name != 'postgresql':
+        return False
+    if engine not in _postgis_engines:
+        installed = db.session.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")).first()
+        _postgis_engines[engine] = installed is not None
+    return _postgis_engines[engine]
+
+
+def nearby_company_ids(lat, lon, radius_km, limit, status=None):
+    """
+    Returns up to `limit` (company_id, distance_km) pairs of companies serving (lat, lon),
+    nearest first: those within their service_radius_km of it, or within `radius_km` when they
+    have none.
+    """
+    if not postgis_available():
+        return grid_indexes.get().nearby(lat, lon, radius_km, limit, status=status)
+
+    # The first ST_DWithin has a constant distance, so it can use the index; the second applies
+    # each company's own service radius to what it finds
+    search_km = max(radius_km, max_service_radii.get())
+    params = {'lat': lat, 'lon': lon, 'search_meters': search_km * 1000, 'radius_km': radius_km, 'limit': limit}
+    status_clause = ''
+    if status:
+        params['status'] = status
+        status_clause = 'AND companies.status = :status'
+    stmt = text(
+        f"SELECT companies.id, ST_Distance({_PG_POINT}, point.geog) / 1000 AS distance_km "
+        "FROM companies, "
+        "(SELECT geography(ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)) AS geog) AS point "
+        "WHERE companies.latitude IS NOT NULL AND companies.longitude IS NOT NULL "
+        f"AND ST_DWithin({_PG_POINT}, point.geog, :search_meters) "
+        f"AND ST_DWithin({_PG_POINT}, point.geog, coalesce(companies.service_radius_km, :radius_km) * 1000) "
+        f"{status_clause} "
+        f"ORDER BY {_PG_POINT} <-> point.geog "
+        "LIMIT :limit"
+    )
+    return [(company_id, distance) for company_id, distance in db.session.execute(stmt, params)]
@@ -0,0 +1,299 @@
+# backend/app/importer.py
+"""
+Bulk company import from CSV or NDJSON, used by POST /api/companies/import and
+`flask import-companies`.
+
+Input is parsed as a stream and processed in batches: regions and services are resolved through
+in-memory name maps, duplicates are checked with one query per batch, and companies plus their
+company_service_association rows are written with executemany inserts. A bad row is reported
+with its line number and skipped; it never aborts the rest of the import.
+
+Columns / keys: name, email, phone (required), description, status, region (name) or region_id,
+services (names or ids; ';'-separated in CSV, a list in NDJSON), latitude, longitude, service_radius_km.
+"""
+import csv
+import io
+import json
+import logging
+from itertools import islice
+
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.exc import DBAPIError, IntegrityError, StatementError
+
+from .extensions import db
+from .models import Company, Region, Service, company_service_association
+from . import geo, search
+from .caching import bump_version
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'ndjson')
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+STATUSES = ('pending', 'approved', 'rejected')
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(filename=None, content_type=None):
+    """
+    Guesses the input format from a file name or content type. Returns None if unknown.
+    """
+    if filename:
+        lowered = filename.lower()
+        if lowered.endswith('.csv'):
+            return 'csv'
+        if lowered.endswith(('.ndjson', '.jsonl')):
+            return 'ndjson'
+    if content_type:
+        if 'csv' in content_type:
+            return 'csv'
+        if 'ndjson' in content_type or 'jsonlines' in content_type or 'json' in content_type:
+            return 'ndjson'
+    return None
+
+
+def parse_rows(stream, fmt):
+    """
+    Yields (line_number, record) from a binary stream. A record that cannot be parsed
+    is yielded as a RowError instead of a dict.
+    """
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, RowError(f'Invalid JSON: {e}')
+                continue
+            if not isinstance(record, dict):
+                yield line_number, RowError('Each line must be a JSON object')
+                continue
+            yield line_number, record
+    else:
+        raise ValueError(f'Unsupported import format: {fmt}')
+
+
+class CompanyImporter:
+    def __init__(self, created_by_user_id=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.created_by_user_id = created_by_user_id
+        self.batch_size = batch_size
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        # Keys already used earlier in this import
+        self.seen_names = set()
+        self.seen_emails = set()
+
+        regions = db.session.execute(select(Region.id, Region.name)).all()
+        self.region_ids = {region_id for region_id, _ in regions}
+        self.regions_by_name = {name.lower(): region_id for region_id, name in regions}
+        services = db.session.execute(select(Service.id, Service.name)).all()
+        self.service_ids = {service_id for service_id, _ in services}
+        self.services_by_name = {name.lower(): service_id for service_id, name in services}
+
+    def _error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def _resolve_region(self, record):
+        region = record.get('region_id') or record.get('region')
+        if region in (None, ''):
+            return None
+        if isinstance(region, int) or str(region).isdigit():
+            if int(region) not in self.region_ids:
+                raise RowError(f'Unknown region id: {region}')
+            return int(region)
+        region_id = self.regions_by_name.get(str(region).strip().lower())
+        if region_id is None:
+            raise RowError(f'Unknown region: {region}')
+        return region_id
+
+    def _resolve_services(self, record):
+        services = record.get('services')
+        if services in (None, ''):
+            return []
+        if isinstance(services, str):
+            services = [s for s in services.split(';') if s.strip()]
+        if not isinstance(services, list):
+            raise RowError('services must be a list or a ;-separated string')
+        service_ids = []
+        for service in services:
+            if isinstance(service, int) or str(service).strip().isdigit():
+                service_id = int(service) if int(service) in self.service_ids else None
+            else:
+                service_id = self.services_by_name.get(str(service).strip().lower())
+            if service_id is None:
+                raise RowError(f'Unknown service: {service}')
+            if service_id not in service_ids:
+                service_ids.append(service_id)
+        return service_ids
+
+    def _location(self, record):
+        values = {}
+        bounds = {'latitude': (-90, 90), 'longitude': (-180, 180), 'service_radius_km': (0, None)}
+        for field, (low, high) in bounds.items():
+            value = record.get(field)
+            if value in (None, ''):
+                values[field] = None
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise RowError(f'{field} must be a number')
+            if value < low or (high is not None and value > high):
+                raise RowError(f'{field} is out of range')
+            values[field] = value
+        if (values['latitude'] is None) != (values['longitude'] is None):
+            raise RowError('latitude and longitude must be given together')
+        return values
+
+    def _text(self, record, field):
+        # NDJSON values can be of any JSON type; numbers (e.g. phone numbers) are taken as text
+        value = record.get(field)
+        if value is None:
+            return ''
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if not isinstance(value, str):
+            raise RowError(f'{field} must be a string')
+        return value.strip()
+
+    def _validate(self, record):
+        values = {}
+        for field in ('name', 'email', 'phone'):
+            value = self._text(record, field)
+            if not value:
+                raise RowError(f'{field} is required')
+            values[field] = value
+        values['description'] = self._text(record, 'description') or None
+        status = self._text(record, 'status') or 'pending'
+        if status not in STATUSES:
+            raise RowError('status must be "pending", "approved", or "rejected"')
+        values['status'] = status
+        values['region_id'] = self._resolve_region(record)
+        values.update(self._location(record))
+        values['user_id'] = self.created_by_user_id
+
+        email_key = values['email'].lower()
+        if values['name'] in self.seen_names:
+            raise RowError(f"Duplicate company name in import: {values['name']}")
+        if email_key in self.seen_emails:
+            raise RowError(f"Duplicate company email in import: {values['email']}")
+        return values, self._resolve_services(record)
+
+    def _existing_keys(self, rows):
+        names = [values['name'] for _, values, _ in rows]
+        emails = [values['email'].lower() for _, values, _ in rows]
+        existing = db.session.execute(
+            select(Company.name, Company.email).where(or_(Company.name.in_(names), func.lower(Company.email).in_(emails)))
+        ).all()
+        return {name for name, _ in existing}, {email.lower() for _, email in existing}
+
+    def _insert(self, rows):
+        """
+        Inserts companies and their service links with one executemany each. Returns the new ids.
+        """
+        companies = Company.__table__
+        # RETURNING order is not guaranteed for multi-row inserts on every backend, so new ids
+        # are matched back through the company name, which is unique within a batch.
+        result = db.session.execute(
+            insert(companies).returning(companies.c.id, companies.c.name),
+            [values for _, values, _ in rows]
+        )
+        ids_by_name = {name: company_id for company_id, name in result}
+        links = [
+            {'company_id': ids_by_name[values['name']], 'service_id': service_id}
+            for _, values, service_ids in rows
+            for service_id in service_ids
+        ]
+        if links:
+            db.session.execute(insert(company_service_association), links)
+        return list(ids_by_name.values())
+
+    def _import_batch(self, batch):
+        rows = []
+        for line_number, record in batch:
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                values, service_ids = self._validate(record)
+            except RowError as e:
+                self._error(line_number, str(e))
+                continue
+            self.seen_names.add(values['name'])
+            self.seen_emails.add(values['email'].lower())
+            rows.append((line_number, values, service_ids))
+        if not rows:
+            return
+
+        existing_names, existing_emails = self._existing_keys(rows)
+        new_rows = []
+        for row in rows:
+            line_number, values, _ = row
+            if values['name'] in existing_names:
+                self._error(line_number, f"Company name already exists: {values['name']}")
+            elif values['email'].lower() in existing_emails:
+                self._error(line_number, f"Company email already exists: {values['email']}")
+            else:
+                new_rows.append(row)
+        if not new_rows:
+            return
+
+        try:
+            with db.session.begin_nested():
+                company_ids = self._insert(new_rows)
+        except (IntegrityError, DBAPIError, StatementError):
+            # Something raced us, violated another constraint or was rejected by the database
+            # (e.g. a value too long for its column): isolate the offending rows.
+            company_ids = []
+            for row in new_rows:
+                try:
+                    with db.session.begin_nested():
+                        company_ids.extend(self._insert([row]))
+                except (IntegrityError, DBAPIError, StatementError) as e:
+                    self._error(row[0], f'Database rejected the row: {getattr(e, "orig", None) or e}')
+
+        search.refresh_companies(company_ids)
+        if company_ids:
+            if any(values['latitude'] is not None for _, values, _ in new_rows):
+                bump_version(geo.LOCATIONS_VERSION)
+            bump_version('companies')
+        db.session.commit()
+        self.created += len(company_ids)
+
+    def run(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self._import_batch(batch)
+        logger.info("Company import finished: %d created, %d failed.", self.created, self.failed)
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def import_companies(stream, fmt, created_by_user_id=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Imports companies from a binary stream in the given format ('csv' or 'ndjson') and
+    returns a report: {'created', 'failed', 'errors': [{'line', 'error'}], 'errors_truncated'}.
+    """
+    importer = CompanyImporter(created_by_user_id=created_by_user_id, batch_size=batch_size)
+    return importer.run(parse_rows(stream, fmt))
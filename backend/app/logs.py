@@ -0,0 +1,168 @@
+# backend/app/logs.py
+"""
+Logging pipeline: the request thread only puts records on a queue, and a listener thread
+formats them (as JSON lines by default) and writes them to stderr.
+
+Call sites use lazy %-style arguments, so records below LOG_LEVEL cost a level check and
+nothing else. Enabled records have their message merged in the calling thread (the arguments
+may change afterwards) and are tagged with the request's correlation id; JSON encoding and the
+write happen on the listener. The queue is bounded: when the writer falls behind, records are
+dropped and counted in log_records_dropped rather than blocking requests.
+
+Each request gets a correlation id, taken from an incoming X-Request-ID header when it looks
+sane and generated otherwise; it is echoed in the X-Request-ID response header.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import request
+
+from .metrics import LOG_RECORDS_DROPPED
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_valid_request_id = re.compile(r'^[A-Za-z0-9._:-]{1,128}$').match
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has; anything else was passed with `extra=` and goes into the JSON
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, request_id, extras and exception.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', '-') != '-':
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener and drops records when the queue is full.
+    """
+
+    def prepare(self, record):
+        record.request_id = request_id_var.get() or '-'
+        # Merge the arguments now: they may be mutated (or be ORM attributes) by the time the listener runs
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class Sampler:
+    """
+    Lets through roughly `rate` of the events it is asked about (1.0 = all of them).
+    """
+
+    def __init__(self, rate=1.0):
+        self.rate = rate
+
+    def __call__(self):
+        return self.rate >= 1 or random.random() < self.rate
+
+
+# "Role Check" is logged on every authorized request; see LOG_ROLE_CHECK_SAMPLE_RATE
+role_check_sampler = Sampler()
+
+_handler = None
+_listener = None
+
+
+def _start_listener(output_handler, queue_size):
+    global _listener
+    _handler.queue = queue.Queue(queue_size)
+    _listener = QueueListener(_handler.queue, output_handler)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork(); workers start their own on a fresh queue
+    if _listener is not None:
+        _start_listener(_listener.handlers[0], _handler.queue.maxsize)
+
+
+def configure_logging(level=logging.INFO, fmt='json', queue_size=10_000):
+    """
+    Routes the root logger through the queue. Safe to call again (e.g. once per create_app).
+    """
+    global _handler
+    output_handler = logging.StreamHandler()
+    output_handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    if _handler is None:
+        _handler = RequestQueueHandler(queue.Queue(queue_size))
+        atexit.register(_stop_listener)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+    else:
+        _stop_listener()
+    _start_listener(output_handler, queue_size)
+    if _handler not in root.handlers:
+        root.addHandler(_handler)
+    root.setLevel(level)
+
+
+def _assign_request_id():
+    incoming = request.headers.get(REQUEST_ID_HEADER)
+    request_id_var.set(incoming if incoming and _valid_request_id(incoming) else uuid.uuid4().hex)
+
+
+def _echo_request_id(response):
+    request_id = request_id_var.get()
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+def _clear_request_id(exc):
+    request_id_var.set(None)
+
+
+def init_app(app):
+    """
+    Configures logging from LOG_* settings and gives every request of `app` a correlation id.
+    """
+    level = app.config['LOG_LEVEL'] or ('DEBUG' if app.debug else 'INFO')
+    configure_logging(level=level, fmt=app.config['LOG_FORMAT'], queue_size=app.config['LOG_QUEUE_SIZE'])
+    role_check_sampler.rate = app.config['LOG_ROLE_CHECK_SAMPLE_RATE']
+    app.before_request(_assign_request_id)
+    app.after_request(_echo_request_id)
+    app.teardown_request(_clear_request_id)
@@ -0,0 +1,156 @@
+# backend/app/metrics.py
+"""
+Prometheus metrics, served at GET /metrics in the text exposition format.
+
+Request latency, request/response sizes and in-flight requests are recorded per blueprint and
+endpoint; DB pool gauges follow pool events; password hashing time is recorded by app.passwords and dropped log records by app.logs.
+Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) switches prometheus_client to
+its mmap-backed multiprocess store, so a scrape served by any worker aggregates all of them.
+Recording is a dict lookup plus an mmap write per metric, a few microseconds per request.
+
+Scrapers must send METRICS_TOKEN as a Bearer token; until it is set /metrics answers 404, unless
+METRICS_PUBLIC opens it to anyone who can reach the app (only for a private network).
+"""
+import hmac
+import logging
+import os
+import time
+
+from flask import Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+from .extensions import db
+from .warmup import WARMUP_ENVIRON_KEY
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce the response (headers) of a request',
+    ['blueprint', 'endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS
+)
+REQUEST_SIZE = Histogram(
+    'http_request_size_bytes', 'Request body size', ['blueprint', 'endpoint'], buckets=SIZE_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size (streamed bodies are not included)',
+    ['blueprint', 'endpoint'], buckets=SIZE_BUCKETS
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Requests currently being handled', multiprocess_mode='livesum'
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out_connections', 'Connections currently checked out of the pool', multiprocess_mode='livesum'
+)
+DB_POOL_OPEN = Gauge(
+    'db_pool_open_connections', 'Open database connections held by the pool', multiprocess_mode='livesum'
+)
+DB_POOL_CONNECTS = Counter('db_pool_connects', 'New database connections opened')
+DB_POOL_INVALIDATIONS = Counter('db_pool_invalidations', 'Connections invalidated (e.g. after a disconnect)')
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time waited for a pooled connection', buckets=LATENCY_BUCKETS
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter('db_pool_checkout_timeouts', 'Checkouts that gave up waiting for a connection')
+
+PASSWORD_HASH_TIME = Histogram(
+    'password_hash_duration_seconds', 'Time spent computing password hashes', ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+PASSWORD_HASH_REJECTIONS = Counter(
+    'password_hash_rejections', 'Hashing requests rejected because the hashing queue was full or slow'
+)
+
+LOG_RECORDS_DROPPED = Counter('log_records_dropped', 'Log records dropped because the logging queue was full')
+
+# (metric, label values) -> labelled child, so the hot path skips label validation
+_children = {}
+
+
+def _child(metric, *labels):
+    key = (metric, labels)
+    child = _children.get(key)
+    if child is None:
+        child = _children[key] = metric.labels(*labels)
+    return child
+
+
+def _start_request():
+    if WARMUP_ENVIRON_KEY in request.environ:
+        return
+    g.metrics_started = time.perf_counter()
+    REQUESTS_IN_PROGRESS.inc()
+
+
+def _record_response(response):
+    started = g.get('metrics_started')
+    if started is None:
+        return response
+    blueprint = request.blueprint or ''
+    endpoint = request.endpoint or 'unmatched'
+    _child(REQUEST_LATENCY, blueprint, endpoint, request.method, str(response.status_code)).observe(
+        time.perf_counter() - started
+    )
+    if request.content_length:
+        _child(REQUEST_SIZE, blueprint, endpoint).observe(request.content_length)
+    if not response.is_streamed:
+        _child(RESPONSE_SIZE, blueprint, endpoint).observe(response.calculate_content_length() or 0)
+    return response
+
+
+def _finish_request(exc):
+    if g.pop('metrics_started', None) is not None:
+        REQUESTS_IN_PROGRESS.dec()
+
+
+def instrument_engine(engine):
+    event.listen(engine, 'checkout', lambda *args: DB_POOL_CHECKED_OUT.inc())
+    event.listen(engine, 'checkin', lambda *args: DB_POOL_CHECKED_OUT.dec())
+    event.listen(engine, 'connect', lambda *args: (DB_POOL_OPEN.inc(), DB_POOL_CONNECTS.inc()))
+    event.listen(engine, 'close', lambda *args: DB_POOL_OPEN.dec())
+    event.listen(engine, 'close_detached', lambda *args: DB_POOL_OPEN.dec())
+    event.listen(engine, 'invalidate', lambda *args: DB_POOL_INVALIDATIONS.inc())
+
+
+def render_metrics():
+    """
+    The current metrics of all workers (or of this process without a multiprocess dir).
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+def metrics_view():
+    config = current_app.config
+    token = config['METRICS_TOKEN']
+    if not token:
+        if not config['METRICS_PUBLIC']:
+            return Response('Not Found\n', status=404, mimetype='text/plain')
+    elif not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(render_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    """
+    Records request metrics for `app`, pool metrics for its engine, and serves GET /metrics.
+    """
+    if not app.config['METRICS_ENABLED']:
+        return
+    with app.app_context():
+        instrument_engine(db.engine)
+    app.before_request(_start_request)
+    app.after_request(_record_response)
+    app.teardown_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
+    if not app.config['METRICS_TOKEN'] and not app.config['METRICS_PUBLIC']:
+        logger.info("GET /metrics is not served until METRICS_TOKEN (or METRICS_PUBLIC) is set.")
@@ -1,15 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.extensions import db
-from sqlalchemy import UniqueConstraint, event # Import event for listener
+from app.passwords import hash_password, verify_password, needs_rehash
+from sqlalchemy import UniqueConstraint, event, func # Import event for listener
 
 
 # Association table for Many-to-Many Company-Service relationship
 company_service_association = db.Table(
     'company_service_association',
     db.Column('company_id', db.Integer, db.ForeignKey('companies.id', ondelete='CASCADE'), primary_key=True),
-    db.Column('service_id', db.Integer, db.ForeignKey('services.id', ondelete='CASCADE'), primary_key=True)
+    db.Column('service_id', db.Integer, db.ForeignKey('services.id', ondelete='CASCADE'), primary_key=True),
+    # The primary key covers lookups by company; this covers "companies offering service X"
+    db.Index('ix_company_service_service_id_company_id', 'service_id', 'company_id')
 )
 
 
@@ -27,6 +29,11 @@ class User(db.Model):
     # Define a one-to-one relationship from User to Company for company_owner
     company_profile = db.relationship('Company', back_populates='login_user', foreign_keys=[company_id])
 
+    # Where the user lives; residents of a region are notified about companies and services there
+    region_id = db.Column(db.Integer, db.ForeignKey('regions.id', ondelete='SET NULL'), nullable=True, index=True)
+    # Denormalized count of unread notifications, kept in step by app/notifications.py
+    unread_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
 
     # Existing relationship: Companies created by this user (e.g., admin creating companies)
     companies_created = db.relationship( # Renamed from 'companies' for clarity
@@ -39,13 +46,22 @@ class User(db.Model):
 
     # NEW: Explicitly name the unique constraint for 'company_id'
     # A user can only be the login_user for one company
-    __table_args__ = (UniqueConstraint('company_id', name='_user_company_id_uc'),) # <--- ADD THIS LINE
+    __table_args__ = (
+        UniqueConstraint('company_id', name='_user_company_id_uc'), # <--- ADD THIS LINE
+        # Case-insensitive uniqueness; registration looks users up by lower(...) through these
+        db.Index('uq_users_username_lower', func.lower(username), unique=True),
+        db.Index('uq_users_email_lower', func.lower(email), unique=True),
+    )
 
+    # Hashing runs in the bounded pool of app/passwords.py and may raise PasswordHashingBusy
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f"<User {self.username} (Role: {self.role})>"
@@ -60,7 +76,7 @@ class Company(db.Model):
     phone = db.Column(db.String(20), nullable=False)
     status = db.Column(db.String(50), default='pending', nullable=False)
     description = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     # Foreign Key to User who initially created the company (e.g., an admin)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
@@ -73,6 +89,11 @@ class Company(db.Model):
     region_id = db.Column(db.Integer, db.ForeignKey('regions.id', ondelete='SET NULL'), nullable=True)
     region = db.relationship('Region', back_populates='companies')
 
+    # Base location (WGS84 degrees) and how far from it the company collects, for "near me" lookups
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    service_radius_km = db.Column(db.Float, nullable=True)
+
     services = db.relationship(
         'Service',
         secondary=company_service_association,
@@ -81,7 +102,16 @@ class Company(db.Model):
         cascade="all"
     )
 
-    __table_args__ = (UniqueConstraint('name', name='_company_name_uc'),)
+    __table_args__ = (
+        UniqueConstraint('name', name='_company_name_uc'),
+        db.Index('uq_companies_email_lower', func.lower(email), unique=True),
+        # Keyset pagination indexes for the directory listing (newest first, optionally filtered)
+        db.Index('ix_companies_created_at_id', 'created_at', 'id'),
+        db.Index('ix_companies_status_created_at_id', 'status', 'created_at', 'id'),
+        db.Index('ix_companies_region_id_created_at_id', 'region_id', 'created_at', 'id'),
+        # Region x service x status coverage lookups; covers the join with company_service_association
+        db.Index('ix_companies_region_id_status_id', 'region_id', 'status', 'id'),
+    )
 
     def __repr__(self):
         return f'<Company {self.name}>'
@@ -140,3 +170,45 @@ class Service(db.Model):
 
     def __repr__(self):
         return f'<Service {self.name}>'
+
+
+class Notification(db.Model):
+    """
+    A message for one user. Rows are written in bulk by app.notifications.fan_out(), one
+    INSERT ... SELECT per event, however many users it reaches.
+    """
+    __tablename__ = 'notifications'
+
+    # 64-bit: every fan-out adds a row per recipient
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(30), nullable=False)
+    message = db.Column(db.String(500), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    read_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # A user's notifications newest first, paged by id
+        db.Index('ix_notifications_user_id_id', 'user_id', 'id'),
+        # Unread ones only: ?unread=1 and "mark all read"
+        db.Index('ix_notifications_user_id_unread', 'user_id', 'id',
+                 postgresql_where=read_at.is_(None), sqlite_where=read_at.is_(None)),
+    )
+
+    def __repr__(self):
+        return f'<Notification {self.id} for user {self.user_id}>'
+
+
+class TableVersion(db.Model):
+    """
+    Monotonic per-table change counter, bumped in the same transaction as every write to the
+    table. Read endpoints derive their ETags from it (see app/caching.py).
+    """
+    __tablename__ = 'table_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TableVersion {self.name}={self.version}>'
@@ -0,0 +1,113 @@
+# backend/app/notifications.py
+"""
+Notifications: fan-out on company events, and the unread counter kept on each user.
+
+fan_out() notifies every user matching some criteria with one INSERT ... SELECT, so telling the
+100k residents of a region about a new company is a single statement and no user is loaded into
+Python. The recipients' users.unread_count goes up by one in the same transaction: on PostgreSQL
+the UPDATE ... RETURNING feeds the INSERT as a CTE (still one statement); elsewhere an UPDATE with
+the same criteria follows the INSERT. Callers fan out before committing their own write, so the
+notifications commit or roll back with it.
+
+Events: status changes notify the company's owner login; a company becoming approved, and an
+approved company offering a service no other approved company in its region offers, notify the
+residents of that region (users.region_id).
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, exists, insert, literal, select, update
+from sqlalchemy.orm import QueryableAttribute
+from sqlalchemy.sql.elements import ColumnElement
+
+from .extensions import db
+from .models import Company, Notification, Region, Service, User, company_service_association
+
+NOTIFICATION_COLUMNS = ('user_id', 'kind', 'message', 'company_id', 'created_at')
+MAX_MESSAGE_LENGTH = 500
+
+
+def fan_out(kind, message, *criteria, company_id=None):
+    """
+    Notifies every user matching `criteria` (expressions on User). `company_id` is an id, None,
+    or a User column such as User.company_id. Returns the number of notifications written.
+    """
+    from_user = isinstance(company_id, (ColumnElement, QueryableAttribute))
+    if not from_user:
+        company_id = literal(company_id, db.Integer)
+    values = (literal(kind), literal(message[:MAX_MESSAGE_LENGTH]), literal(datetime.utcnow()))
+    bump = update(User).where(*criteria).values(unread_count=User.unread_count + 1)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        if from_user:
+            recipients = bump.returning(User.id, company_id.label('company_id')).cte('recipients')
+            company_id = recipients.c.company_id
+        else:
+            recipients = bump.returning(User.id).cte('recipients')
+        rows = select(recipients.c.id, values[0], values[1], company_id, values[2])
+        # A data-modifying CTE has to be attached to the top-level statement
+        stmt = insert(Notification).from_select(NOTIFICATION_COLUMNS, rows).add_cte(recipients)
+        return db.session.execute(stmt).rowcount
+    rows = select(User.id, values[0], values[1], company_id, values[2]).where(*criteria)
+    written = db.session.execute(insert(Notification).from_select(NOTIFICATION_COLUMNS, rows)).rowcount
+    db.session.execute(bump, execution_options={'synchronize_session': False})
+    return written
+
+
+def mark_read(user_id, ids=None):
+    """
+    Marks the user's unread notifications read (all of them, or those in `ids`) and lowers the
+    counter by the number that changed, which is returned.
+    """
+    criteria = [Notification.user_id == user_id, Notification.read_at.is_(None)]
+    if ids is not None:
+        criteria.append(Notification.id.in_(ids))
+    marked = db.session.execute(
+        update(Notification).where(*criteria).values(read_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    if marked:
+        db.session.execute(
+            update(User).where(User.id == user_id).values(unread_count=User.unread_count - marked),
+            execution_options={'synchronize_session': False}
+        )
+    return marked
+
+
+def notify_status_change(company_ids, status):
+    """
+    Tells the owner logins of `company_ids` (a list, or a select() of ids) their new status.
+    """
+    return fan_out('company_status', f"Your company's status was changed to {status}.",
+                   User.company_id.in_(company_ids), company_id=User.company_id)
+
+
+def notify_company_listed(company):
+    """
+    Tells the residents of the company's region that it is now listed.
+    """
+    if company.region_id is None:
+        return 0
+    region_name = db.session.scalar(select(Region.name).where(Region.id == company.region_id))
+    return fan_out('company_listed', f'{company.name} is now listed in {region_name}.',
+                   User.region_id == company.region_id, company_id=company.id)
+
+
+def notify_new_services(company, service_ids):
+    """
+    Tells the residents of the company's region about those of `service_ids` (just added to an
+    approved company) that no other approved company in the region offers.
+    """
+    if company.region_id is None or company.status != 'approved' or not service_ids:
+        return 0
+    offered_elsewhere = exists().where(
+        company_service_association.c.service_id == Service.id,
+        company_service_association.c.company_id == Company.id,
+        and_(Company.region_id == company.region_id, Company.status == 'approved', Company.id != company.id),
+    )
+    names = db.session.scalars(
+        select(Service.name).where(Service.id.in_(service_ids), ~offered_elsewhere).order_by(Service.name)
+    ).all()
+    if not names:
+        return 0
+    region_name = db.session.scalar(select(Region.name).where(Region.id == company.region_id))
+    return fan_out('new_service', f"{', '.join(names)} now available in {region_name} from {company.name}.",
+                   User.region_id == company.region_id, company_id=company.id)
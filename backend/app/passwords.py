@@ -0,0 +1,154 @@
+# backend/app/passwords.py
+"""
+Password hashing off the request thread, with bounded concurrency.
+
+PBKDF2 is deliberately expensive. Running it inline lets a burst of logins/registrations occupy
+every worker thread, so all hashing goes through one small thread pool per process: at most
+PASSWORD_HASH_CONCURRENCY hashes run at once, at most PASSWORD_HASH_QUEUE_SIZE more wait, and a
+waiting hash that has not started after PASSWORD_HASH_QUEUE_TIMEOUT seconds is abandoned. Both
+overflow cases raise PasswordHashingBusy, which create_app() turns into a 503.
+(hashlib releases the GIL while hashing, so the pool runs in parallel with request threads.)
+
+The request still waits for its hash, so the pool only frees the worker for other requests in the
+threaded modes: gthread (GUNICORN_THREADS above 1) and gevent. A default sync worker with one
+thread serves nothing else meanwhile, and holds at most one hash at a time, so there the pool
+merely caps CPU use and never queues or rejects.
+
+Under gevent workers the pool is a gevent ThreadPool of native threads, so hashing still runs in
+parallel while the waiting greenlet yields; the same limits are enforced with gevent semaphores.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from .cooperative import monkey_patched
+from .metrics import PASSWORD_HASH_REJECTIONS, PASSWORD_HASH_TIME
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(Exception):
+    """
+    Raised when the hashing queue is full or a queued hash waited too long to start.
+    """
+
+
+class HashingPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._running = None
+        self._settings = None
+
+    def _ensure(self, concurrency, queue_size):
+        settings = (concurrency, queue_size)
+        with self._lock:
+            if self._executor is None or self._settings != settings:
+                if self._running is not None:
+                    self._executor.kill()
+                elif self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                if monkey_patched():
+                    from gevent.threadpool import ThreadPool
+                    self._executor = ThreadPool(concurrency)
+                    # One slot per running hash; acquired and released by the waiting greenlets
+                    self._running = threading.Semaphore(concurrency)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='password-hash')
+                    self._running = None
+                # One slot per running or waiting hash
+                self._slots = threading.BoundedSemaphore(concurrency + queue_size)
+                self._settings = settings
+            return self._executor, self._slots, self._running
+
+    def reset(self):
+        """
+        Forgets the executor without joining it, e.g. in a freshly forked worker where its threads do not exist.
+        """
+        self._executor = None
+        self._slots = None
+        self._running = None
+        self._settings = None
+        self._lock = threading.Lock()
+
+    def run(self, fn, *args, operation='hash'):
+        config = current_app.config
+        executor, slots, running = self._ensure(config['PASSWORD_HASH_CONCURRENCY'], config['PASSWORD_HASH_QUEUE_SIZE'])
+
+        if not slots.acquire(blocking=False):
+            logger.warning("Password hashing queue full; rejecting request.")
+            PASSWORD_HASH_REJECTIONS.inc()
+            raise PasswordHashingBusy()
+        if running is not None:
+            return self._run_cooperative(executor, slots, running, fn, args, operation,
+                                         config['PASSWORD_HASH_QUEUE_TIMEOUT'])
+
+        started = threading.Event()
+
+        def task():
+            started.set()
+            begin = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                PASSWORD_HASH_TIME.labels(operation).observe(time.perf_counter() - begin)
+                slots.release()
+
+        try:
+            future = executor.submit(task)
+        except RuntimeError:
+            slots.release()
+            raise
+        if not started.wait(config['PASSWORD_HASH_QUEUE_TIMEOUT']) and future.cancel():
+            slots.release()
+            PASSWORD_HASH_REJECTIONS.inc()
+            logger.warning("Password hash waited more than %ss to start; rejecting request.",
+                           config['PASSWORD_HASH_QUEUE_TIMEOUT'])
+            raise PasswordHashingBusy()
+        return future.result()
+
+    def _run_cooperative(self, executor, slots, running, fn, args, operation, queue_timeout):
+        # Semaphores are only touched by greenlets; the native thread just runs `fn`
+        try:
+            if not running.acquire(timeout=queue_timeout):
+                PASSWORD_HASH_REJECTIONS.inc()
+                logger.warning("Password hash waited more than %ss to start; rejecting request.", queue_timeout)
+                raise PasswordHashingBusy()
+            begin = time.perf_counter()
+            try:
+                return executor.apply(fn, args)
+            finally:
+                PASSWORD_HASH_TIME.labels(operation).observe(time.perf_counter() - begin)
+                running.release()
+        finally:
+            slots.release()
+
+
+hashing_pool = HashingPool()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=hashing_pool.reset)
+
+
+def hash_password(password):
+    config = current_app.config
+    return hashing_pool.run(
+        generate_password_hash, password, config['PASSWORD_HASH_METHOD'], config['PASSWORD_HASH_SALT_LENGTH']
+    )
+
+
+def verify_password(password_hash, password):
+    return hashing_pool.run(check_password_hash, password_hash, password, operation='verify')
+
+
+def needs_rehash(password_hash):
+    """
+    True when `password_hash` was produced with other parameters than PASSWORD_HASH_METHOD.
+    """
+    return password_hash.split('$', 1)[0] != current_app.config['PASSWORD_HASH_METHOD']
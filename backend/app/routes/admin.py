@@ -0,0 +1,21 @@
+# backend/app/routes/admin.py
+from flask import Blueprint, jsonify
+import logging
+
+from ..models import db
+from ..authz import role_required
+from ..dbpool import pool_status
+
+logger = logging.getLogger(__name__)
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+# Connection pool telemetry for the worker that serves the request (Admin only)
+@admin_bp.route('/pool', methods=['GET'])
+@role_required(['admin'])
+def get_pool_status(current_user):
+    """
+    Reports live checkouts/overflow and this worker's connect, close, invalidation
+    and checkout-wait counters. Each worker process keeps its own numbers (see `pid`).
+    """
+    return jsonify(pool_status(db.engine))
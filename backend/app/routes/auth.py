@@ -1,16 +1,60 @@
 # backend/app/routes/auth.py
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func, literal, select, union_all
 from sqlalchemy.exc import IntegrityError
 import logging
 import traceback
 
 from ..models import User, Company, Region, Service, db
+from .. import search
+from ..authz import create_user_token
+from ..caching import bump_version
+from ..passwords import PasswordHashingBusy
 
 logger = logging.getLogger(__name__)
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+# Registration fields that must be unique: column, whether uniqueness ignores case,
+# and the names of the constraints/indexes enforcing it (as they appear in IntegrityError messages).
+UNIQUE_FIELDS = {
+    'username': (User.username, True, ('uq_users_username_lower', 'users.username', 'users_username_key')),
+    'user_email': (User.email, True, ('uq_users_email_lower', 'users.email', 'users_email_key')),
+    'company_name': (Company.name, False, ('_company_name_uc', 'companies.name')),
+    'company_email': (Company.email, True, ('uq_companies_email_lower', 'companies.email', 'companies_email_key')),
+}
+
+def all_strings(*values):
+    """
+    Whether every submitted value is a string. JSON bodies can carry numbers, lists or objects
+    where text is expected, and those must be refused before they reach a query.
+    """
+    return all(isinstance(value, str) for value in values)
+
+def find_conflict(values):
+    """
+    Checks every field of `values` (field -> submitted string) for an existing row in a single
+    query. Returns the first conflicting field in `values` order, or None.
+    """
+    checks = []
+    for field, value in values.items():
+        column, case_insensitive, _ = UNIQUE_FIELDS[field]
+        condition = func.lower(column) == value.lower() if case_insensitive else column == value
+        checks.append(select(literal(field).label('field')).where(condition))
+    taken = set(db.session.execute(union_all(*checks)).scalars())
+    return next((field for field in values if field in taken), None)
+
+def conflict_from_integrity_error(error, fields):
+    """
+    Maps a unique violation raised on insert (a registration race) back to the field it concerns.
+    """
+    message = str(error.orig)
+    for field in fields:
+        if any(name in message for name in UNIQUE_FIELDS[field][2]):
+            return field
+    return None
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """
@@ -23,30 +67,46 @@ def register():
 
     if not username or not email or not password:
         return jsonify({'error': 'Username, email, and password are required'}), 400
+    if not all_strings(username, email, password):
+        return jsonify({'error': 'Username, email, and password must be strings'}), 400
 
-    if User.query.filter_by(username=username).first():
-        return jsonify({'error': 'Username already exists'}), 409
-    if User.query.filter_by(email=email).first():
-        return jsonify({'error': 'Email already exists'}), 409
+    conflict_messages = {'username': 'Username already exists', 'user_email': 'Email already exists'}
+    conflict = find_conflict({'username': username, 'user_email': email})
+    if conflict:
+        return jsonify({'error': conflict_messages[conflict]}), 409
 
     try:
         new_user = User(username=username, email=email, role='user') # Default role 'user'
         new_user.set_password(password)
         db.session.add(new_user)
+        db.session.flush()
+
+        # Built before the commit, which would expire new_user and cost a reload
+        access_token = create_user_token(new_user)
+        user_data = {
+            'id': new_user.id,
+            'username': new_user.username,
+            'email': new_user.email,
+            'role': new_user.role
+        }
         db.session.commit()
 
-        access_token = create_access_token(identity=str(new_user.id))
-        logger.info(f"User '{new_user.username}' registered successfully.")
+        logger.info("User '%s' registered successfully.", username)
         return jsonify({
             'message': 'User registered successfully',
             'access_token': access_token,
-            'user': {
-                'id': new_user.id,
-                'username': new_user.username,
-                'email': new_user.email,
-                'role': new_user.role
-            }
+            'user': user_data
         }), 201
+    except IntegrityError as e:
+        db.session.rollback()
+        conflict = conflict_from_integrity_error(e, conflict_messages)
+        if conflict:
+            return jsonify({'error': conflict_messages[conflict]}), 409
+        logger.exception("IntegrityError during user registration:")
+        return jsonify({'error': 'Internal server error during registration'}), 500
+    except PasswordHashingBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         logger.exception("Error during user registration:")
@@ -75,35 +135,42 @@ def register_company():
     # Basic validation
     if not (username and password and user_email and company_name and company_email and company_phone):
         return jsonify({'error': 'All required fields (user credentials and company details) must be provided'}), 400
+    if not all_strings(username, password, user_email, company_name, company_email, company_phone,
+                       company_description or ''):
+        return jsonify({'error': 'User credentials and company details must be strings'}), 400
 
-    # Check for existing username/email for the user account
-    if User.query.filter_by(username=username).first():
-        return jsonify({'error': 'Username already exists'}), 409
-    if User.query.filter_by(email=user_email).first():
-        return jsonify({'error': 'User email already exists'}), 409
-    
-    # Check for existing company name/email
-    if Company.query.filter_by(name=company_name).first():
-        return jsonify({'error': 'Company name already exists'}), 409
-    if Company.query.filter_by(email=company_email).first():
-        return jsonify({'error': 'Company email already exists'}), 409
+    # Check the user account and company for existing username/emails/name in one query
+    conflict_messages = {
+        'username': 'Username already exists',
+        'user_email': 'User email already exists',
+        'company_name': 'Company name already exists',
+        'company_email': 'Company email already exists',
+    }
+    conflict = find_conflict({
+        'username': username,
+        'user_email': user_email,
+        'company_name': company_name,
+        'company_email': company_email,
+    })
+    if conflict:
+        return jsonify({'error': conflict_messages[conflict]}), 409
 
     try:
-        # 1. Create the User record for the company owner
-        new_user = User(username=username, email=user_email, role='company_owner')
-        new_user.set_password(password)
-        db.session.add(new_user)
-
-        # 2. Create the Company record
+        # 1. Resolve region and services before anything is added to the session
         region = None
         if company_region_id:
-            region = Region.query.get(company_region_id)
+            region = db.session.get(Region, company_region_id)
             if not region:
                 return jsonify({'error': 'Invalid region ID provided'}), 400
 
         valid_service_ids = [int(s_id) for s_id in company_service_ids if s_id is not None]
         services = Service.query.filter(Service.id.in_(valid_service_ids)).all() if valid_service_ids else []
 
+        # 2. Create the User record for the company owner and the Company record
+        new_user = User(username=username, email=user_email, role='company_owner')
+        new_user.set_password(password)
+        db.session.add(new_user)
+
         new_company = Company(
             name=company_name,
             email=company_email,
@@ -121,26 +188,36 @@ def register_company():
 
         # 4. Now that new_company has an ID, link new_user.company_id to new_company.id directly.
         new_user.company_id = new_company.id
+        search.refresh_companies([new_company.id])
+        bump_version('companies')
 
+        # Built before the commit, which would expire both objects and cost two reloads
+        access_token = create_user_token(new_user)
+        user_data = {
+            'id': new_user.id,
+            'username': new_user.username,
+            'email': new_user.email,
+            'role': new_user.role,
+            'company_id': new_company.id
+        }
         db.session.commit() # Commit the entire transaction
 
-        access_token = create_access_token(identity=str(new_user.id))
-        logger.info(f"Company '{new_company.name}' and owner '{new_user.username}' registered successfully.")
+        logger.info("Company '%s' and owner '%s' registered successfully.", company_name, username)
         return jsonify({
             'message': 'Company and owner registered successfully',
             'access_token': access_token,
-            'user': {
-                'id': new_user.id,
-                'username': new_user.username,
-                'email': new_user.email,
-                'role': new_user.role,
-                'company_id': new_company.id
-            }
+            'user': user_data
         }), 201
     except IntegrityError as e:
         db.session.rollback()
+        conflict = conflict_from_integrity_error(e, conflict_messages)
+        if conflict:
+            return jsonify({'error': conflict_messages[conflict]}), 409
         logger.exception("IntegrityError during company registration:")
         return jsonify({'error': 'Registration failed due to existing data (e.g., company name/email, user username/email already exists).'}), 409
+    except PasswordHashingBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         logger.exception("Error during company registration:")
@@ -158,8 +235,13 @@ def login():
     user = User.query.filter_by(username=username).first()
 
     if user and user.check_password(password):
-        access_token = create_access_token(identity=str(user.id))
-        logger.info(f"User '{user.username}' logged in successfully.")
+        if user.password_needs_rehash():
+            # Transparently move the stored hash to the configured parameters
+            user.set_password(password)
+            db.session.commit()
+            logger.info("Upgraded password hash for user '%s'.", user.username)
+        access_token = create_user_token(user)
+        logger.info("User '%s' logged in successfully.", user.username)
         
         user_data = {
             'id': user.id,
@@ -168,14 +250,14 @@ def login():
             'role': user.role
         }
         # If the user is a company owner, include their company_id
-        if user.role == 'company_owner' and user.company_profile:
-            user_data['company_id'] = user.company_profile.id
-            logger.info(f"Company owner '{user.username}' logged in for company ID: {user.company_profile.id}")
+        if user.role == 'company_owner' and user.company_id:
+            user_data['company_id'] = user.company_id
+            logger.info("Company owner '%s' logged in for company ID: %s", user.username, user.company_id)
 
         return jsonify({
             'access_token': access_token,
             'user': user_data
         }), 200
     else:
-        logger.warning(f"Failed login attempt for username: {username}")
+        logger.warning("Failed login attempt for username: %s", username)
         return jsonify({'msg': 'Bad username or password'}), 401
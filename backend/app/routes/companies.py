@@ -1,56 +1,32 @@
 # backend/app/routes/companies.py
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import select, tuple_, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, load_only
 import traceback
 import logging
-from functools import wraps
-
-from ..models import Company, Region, Service, User, db
+import base64
+import json
+from datetime import datetime
+from itertools import islice
+
+from ..models import Company, Region, Service, User, company_service_association, db
+from .. import geo, notifications, search
+from ..facets import facet_cache
+from ..sqlstats import query_budget
+from ..caching import bump_version, conditional
+from ..importer import FORMATS, detect_format, import_companies
+from ..authz import role_required, user_cache
+from ..streaming import STREAM_BATCH_SIZE, stream_json_array, wants_stream
 
 logger = logging.getLogger(__name__)
 
-# Custom decorator for role-based access control (copied for self-containment)
-def role_required(allowed_roles):
-    """
-    Decorator to restrict access to a route based on user roles.
-    Requires @jwt_required() to be applied before this decorator.
-    """
-    def decorator(fn):
-        @wraps(fn)
-        @jwt_required()
-        def wrapper(*args, **kwargs):
-            current_user_id_str = get_jwt_identity()
-            
-            logger.debug(f"role_required: JWT Identity extracted: {current_user_id_str}")
-            if current_user_id_str is None:
-                logger.error("role_required: JWT Identity is None. Token might be missing or invalid.")
-                return jsonify({'msg': 'Authorization token missing or invalid'}), 401
-
-            try:
-                current_user_id = int(current_user_id_str)
-            except (ValueError, TypeError):
-                logger.error(f"Invalid user ID in token: {current_user_id_str}")
-                return jsonify({'msg': 'Invalid user identity in token'}), 401
-
-            user = User.query.get(current_user_id)
-            if not user:
-                logger.error(f"User ID {current_user_id} from token not found in DB.")
-                return jsonify({'msg': 'User not found'}), 404
-
-            logger.info(f"Role Check: User '{user.username}' (ID: {user.id}) has role: '{user.role}'. Allowed roles: {allowed_roles}")
-
-            if user.role not in allowed_roles:
-                logger.warning(f"Access Denied: User '{user.username}' (role: {user.role}) attempted to access restricted resource. Allowed roles: {allowed_roles}")
-                return jsonify({'msg': 'Access Denied: Insufficient permissions'}), 403 # Forbidden
-            
-            kwargs['current_user'] = user 
-            return fn(*args, **kwargs)
-        return wrapper
-    return decorator
-
-# Helper function to serialize a company for consistent JSON responses
-def serialize_company(company):
+# Helper function to serialize a company for consistent JSON responses.
+# `services` can be passed in when they were bulk loaded (see serialize_companies);
+# otherwise the dynamic relationship is queried.
+def serialize_company(company, services=None):
+    if services is None:
+        services = [{'id': s.id, 'name': s.name, 'description': s.description} for s in company.services]
     return {
         'id': company.id,
         'name': company.name,
@@ -61,24 +37,381 @@ def serialize_company(company):
         'user_id': company.user_id,
         'user_username': company.user.username if company.user else None,
         'region': {'id': company.region.id, 'name': company.region.name} if company.region else None,
-        'services': [{'id': s.id, 'name': s.name, 'description': s.description} for s in company.services],
-        'created_at': company.created_at.isoformat() if hasattr(company, 'created_at') and company.created_at else None
+        'services': services,
+        'latitude': company.latitude,
+        'longitude': company.longitude,
+        'service_radius_km': company.service_radius_km,
+        # Encoded as ISO 8601 by the JSON provider (app.serialization)
+        'created_at': company.created_at if hasattr(company, 'created_at') else None
     }
 
+def company_read_query(fieldset=None):
+    """
+    Base query for read endpoints: creator and region are joined in the same SELECT
+    so serializing a company never triggers a lazy load for them.
+    With a CompanyFieldset, only what it needs is selected and joined.
+    """
+    if fieldset is not None:
+        return Company.query.options(*fieldset.load_options())
+    return Company.query.options(joinedload(Company.user), joinedload(Company.region))
+
+def load_company_services(company_ids):
+    """
+    Loads the services of many companies in a single query over company_service_association.
+    `company_ids` may be a list of ids or a select() yielding ids.
+    Returns a dict mapping company id -> list of serialized services.
+    """
+    services_by_company = {}
+    stmt = (
+        select(company_service_association.c.company_id, Service.id, Service.name, Service.description)
+        .join(Service, Service.id == company_service_association.c.service_id)
+        .where(company_service_association.c.company_id.in_(company_ids))
+        .order_by(company_service_association.c.company_id, Service.id)
+    )
+    for company_id, service_id, name, description in db.session.execute(stmt):
+        services_by_company.setdefault(company_id, []).append(
+            {'id': service_id, 'name': name, 'description': description}
+        )
+    return services_by_company
+
+def serialize_companies(companies, company_ids=None, fieldset=None):
+    """
+    Serializes a list of companies loaded through company_read_query() with one extra
+    query for all of their services. Pass `company_ids` as a select() when the list is
+    large, so the services query does not have to bind every id. With a CompanyFieldset
+    the companies are serialized by it, and services are only queried when it includes them.
+    """
+    if not companies:
+        return []
+    if fieldset is not None and 'services' not in fieldset.includes:
+        return [fieldset.serialize(c) for c in companies]
+    if company_ids is None:
+        company_ids = [c.id for c in companies]
+    services_by_company = load_company_services(company_ids)
+    serialize = serialize_company if fieldset is None else fieldset.serialize
+    return [serialize(c, services_by_company.get(c.id, [])) for c in companies]
+
+def iter_serialized_companies(query, batch_size=STREAM_BATCH_SIZE, fieldset=None):
+    """
+    Lazily serializes every company of a company_read_query(), `batch_size` rows at a time,
+    with one services query per batch. Used for streamed responses.
+    """
+    rows = iter(query.yield_per(batch_size))
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield from serialize_companies(batch, fieldset=fieldset)
+
+# Columns of a company that ?fields= can select
+COMPANY_FIELDS = ('id', 'name', 'email', 'phone', 'description', 'status', 'user_id',
+                  'latitude', 'longitude', 'service_radius_km', 'created_at')
+# ?include= name -> key it adds to a serialized company (these keys may also be listed in ?fields=)
+COMPANY_INCLUDES = {'user': 'user_username', 'region': 'region', 'services': 'services'}
+
+class CompanyFieldset:
+    """
+    The parts of a company a request asked for with ?fields= and ?include=.
+    Columns outside `fields` are not selected, and relationships outside `includes` are not
+    joined (user, region) or queried (services).
+    """
+
+    def __init__(self, fields, includes):
+        self.fields = tuple(field for field in COMPANY_FIELDS if field in fields)
+        self.includes = tuple(name for name in COMPANY_INCLUDES if name in includes)
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Reads ?fields=a,b and ?include=x,y. Returns None when neither is given, meaning the full
+        serialize_company() output; ?include= alone adds relationships to every column.
+        Raises ValueError with a client-facing message on unknown names.
+        """
+        fields_arg, include_arg = args.get('fields'), args.get('include')
+        if not fields_arg and not include_arg:
+            return None
+        keys_to_includes = {key: name for name, key in COMPANY_INCLUDES.items()}
+        fields, includes = set(), set()
+        for name in filter(None, (include_arg or '').split(',')):
+            if name.strip() not in COMPANY_INCLUDES:
+                raise ValueError(f'Unknown include "{name.strip()}". Allowed: {", ".join(COMPANY_INCLUDES)}')
+            includes.add(name.strip())
+        for name in filter(None, (fields_arg or '').split(',')):
+            name = name.strip()
+            if name in keys_to_includes:
+                includes.add(keys_to_includes[name])
+            elif name in COMPANY_FIELDS:
+                fields.add(name)
+            else:
+                allowed = ', '.join(COMPANY_FIELDS + tuple(keys_to_includes))
+                raise ValueError(f'Unknown field "{name}". Allowed: {allowed}')
+        if not fields_arg:
+            fields.update(COMPANY_FIELDS)
+        return cls(fields, includes)
+
+    def load_options(self):
+        # id and created_at are always loaded: identity, and the cursor of a paginated list
+        columns = {'id', 'created_at', *self.fields}
+        if 'user' in self.includes:
+            columns.add('user_id')
+        if 'region' in self.includes:
+            columns.add('region_id')
+        options = [load_only(*(getattr(Company, column) for column in columns))]
+        if 'user' in self.includes:
+            options.append(joinedload(Company.user).load_only(User.username))
+        if 'region' in self.includes:
+            options.append(joinedload(Company.region).load_only(Region.name))
+        return options
+
+    def serialize(self, company, services=None):
+        data = {field: getattr(company, field) for field in self.fields}
+        if 'user' in self.includes:
+            data['user_username'] = company.user.username if company.user else None
+        if 'region' in self.includes:
+            data['region'] = {'id': company.region.id, 'name': company.region.name} if company.region else None
+        if 'services' in self.includes:
+            data['services'] = services if services is not None else [
+                {'id': s.id, 'name': s.name, 'description': s.description} for s in company.services
+            ]
+        return data
+
+COMPANY_STATUSES = ['pending', 'approved', 'rejected']
+# Upper bound on explicit ids accepted by the bulk status endpoint
+MAX_BULK_STATUS_IDS = 5000
+
+def encode_cursor(company):
+    """
+    Opaque keyset cursor pointing just past `company` in (created_at, id) order.
+    """
+    raw = json.dumps([company.created_at.isoformat(), company.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor. Raises ValueError for anything that was not produced by it.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, company_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(company_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def company_filters(args):
+    """
+    Builds the WHERE criteria for the `status`, `region_id` and `service_id` query parameters.
+    Raises ValueError with a client-facing message on bad input.
+    """
+    criteria = []
+    status = args.get('status')
+    if status:
+        if status not in COMPANY_STATUSES:
+            raise ValueError('Invalid status filter. Must be "pending", "approved", or "rejected"')
+        criteria.append(Company.status == status)
+    region_id = args.get('region_id')
+    if region_id:
+        try:
+            criteria.append(Company.region_id == int(region_id))
+        except ValueError:
+            raise ValueError('region_id must be an integer')
+    service_id = args.get('service_id')
+    if service_id:
+        try:
+            service_id = int(service_id)
+        except ValueError:
+            raise ValueError('service_id must be an integer')
+        criteria.append(Company.id.in_(
+            select(company_service_association.c.company_id)
+            .where(company_service_association.c.service_id == service_id)
+        ))
+    return criteria
+
+# Default and maximum radius (km) for /nearby
+NEARBY_DEFAULT_RADIUS_KM = 10
+NEARBY_MAX_RADIUS_KM = 500
+
+def parse_location_fields(data):
+    """
+    Extracts and validates latitude, longitude and service_radius_km from a request body.
+    Only keys present in `data` are returned (None clears a value). Raises ValueError on bad input.
+    """
+    values = {}
+    bounds = {'latitude': (-90, 90), 'longitude': (-180, 180)}
+    for field in ('latitude', 'longitude', 'service_radius_km'):
+        if field not in data:
+            continue
+        value = data[field]
+        if value is not None:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'{field} must be a number')
+            if field in bounds and not bounds[field][0] <= value <= bounds[field][1]:
+                raise ValueError(f'{field} must be between {bounds[field][0]} and {bounds[field][1]}')
+            if field == 'service_radius_km' and value <= 0:
+                raise ValueError('service_radius_km must be positive')
+        values[field] = value
+    if ('latitude' in values) != ('longitude' in values):
+        raise ValueError('latitude and longitude must be given together')
+    return values
+
 companies_bp = Blueprint('companies', __name__, url_prefix='/api/companies')
 
 # Get all companies (can be public or protected, depending on requirements)
 @companies_bp.route('/', methods=['GET'])
+@conditional('companies', 'regions', 'services', 'users')
+@query_budget(3)
 def get_companies():
-    companies = Company.query.all()
-    results = [serialize_company(c) for c in companies]
+    """
+    Lists companies, optionally filtered by status, region_id and service_id.
+    With `limit` and/or `cursor` the result is one page, newest first, plus `next_cursor`.
+    Without them the full array is returned while COMPANIES_UNPAGINATED_COMPAT is on.
+    `fields` and `include` trim each company (see CompanyFieldset).
+    """
+    try:
+        criteria = company_filters(request.args)
+        fieldset = CompanyFieldset.from_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+
+    if limit is None and cursor is None and current_app.config['COMPANIES_UNPAGINATED_COMPAT']:
+        if wants_stream():
+            return stream_json_array(iter_serialized_companies(company_read_query(fieldset).filter(*criteria),
+                                                               fieldset=fieldset))
+        companies = company_read_query(fieldset).filter(*criteria).all()
+        results = serialize_companies(companies, company_ids=select(Company.id).where(*criteria), fieldset=fieldset)
+        return jsonify(results)
+
+    try:
+        limit = int(limit) if limit is not None else current_app.config['COMPANIES_PAGE_SIZE']
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, current_app.config['COMPANIES_MAX_PAGE_SIZE']))
+
+    if cursor:
+        try:
+            criteria.append(tuple_(Company.created_at, Company.id) < decode_cursor(cursor))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    # Fetch one extra row to know whether another page follows
+    companies = (
+        company_read_query(fieldset)
+        .filter(*criteria)
+        .order_by(Company.created_at.desc(), Company.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = encode_cursor(companies[limit - 1]) if len(companies) > limit else None
+    return jsonify({
+        'companies': serialize_companies(companies[:limit], fieldset=fieldset),
+        'next_cursor': next_cursor
+    })
+
+# Filter counts for the directory UI
+@companies_bp.route('/facets', methods=['GET'])
+@query_budget(2)
+def get_company_facets():
+    """
+    Counts of companies per status, region and service, optionally narrowed by the
+    list endpoint's filters (status, region_id, service_id).
+    """
+    try:
+        criteria = company_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    key = tuple(request.args.get(name) or None for name in ('status', 'region_id', 'service_id'))
+    return jsonify(facet_cache.get(key, criteria))
+
+# Full-text search over name, description, region name and service names
+@companies_bp.route('/search', methods=['GET'])
+@query_budget(4)
+def search_companies():
+    """
+    Ranked company search: /api/companies/search?q=recycl+kisumu[&status=approved][&limit=20]
+    """
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({'error': 'Search query (q) is required'}), 400
+
+    status = request.args.get('status')
+    if status and status not in COMPANY_STATUSES:
+        return jsonify({'error': 'Invalid status filter. Must be "pending", "approved", or "rejected"'}), 400
+
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, current_app.config['COMPANIES_MAX_PAGE_SIZE']))
+
+    company_ids = search.search_company_ids(q, limit, status=status)
+    if not company_ids:
+        return jsonify([])
+    companies = {c.id: c for c in company_read_query().filter(Company.id.in_(company_ids)).all()}
+    ranked = [companies[company_id] for company_id in company_ids if company_id in companies]
+    return jsonify(serialize_companies(ranked))
+
+# Companies near a point, nearest first
+@companies_bp.route('/nearby', methods=['GET'])
+@query_budget(4)
+def nearby_companies():
+    """
+    /api/companies/nearby?lat=-1.29&lon=36.82[&radius=10][&status=approved][&limit=50]
+    Companies serving the point, nearest first: those within their service_radius_km of it, and
+    those without a service radius within `radius`. Each gets `distance_km`, and `serves_location`
+    when it has a service radius.
+    """
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+    except KeyError:
+        return jsonify({'error': 'lat and lon are required'}), 400
+    except ValueError:
+        return jsonify({'error': 'lat and lon must be numbers'}), 400
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        return jsonify({'error': 'lat must be between -90 and 90 and lon between -180 and 180'}), 400
+
+    try:
+        radius = float(request.args.get('radius', NEARBY_DEFAULT_RADIUS_KM))
+        limit = int(request.args.get('limit', current_app.config['COMPANIES_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'radius must be a number and limit an integer'}), 400
+    if radius <= 0:
+        return jsonify({'error': 'radius must be positive'}), 400
+    radius = min(radius, NEARBY_MAX_RADIUS_KM)
+    limit = max(1, min(limit, current_app.config['COMPANIES_MAX_PAGE_SIZE']))
+
+    status = request.args.get('status')
+    if status and status not in COMPANY_STATUSES:
+        return jsonify({'error': 'Invalid status filter. Must be "pending", "approved", or "rejected"'}), 400
+
+    matches = geo.nearby_company_ids(lat, lon, radius, limit, status=status)
+    if not matches:
+        return jsonify([])
+    companies = {c.id: c for c in company_read_query().filter(Company.id.in_([cid for cid, _ in matches])).all()}
+    ordered = [companies[company_id] for company_id, _ in matches if company_id in companies]
+    results = serialize_companies(ordered)
+    distances = dict(matches)
+    for result in results:
+        distance = distances[result['id']]
+        result['distance_km'] = round(distance, 3)
+        radius_km = result['service_radius_km']
+        result['serves_location'] = distance <= radius_km if radius_km is not None else None
     return jsonify(results)
 
 # Get company by id (can be public or protected)
 @companies_bp.route('/<int:company_id>', methods=['GET'])
+@query_budget(2)
 def get_company(company_id):
-    company = Company.query.get_or_404(company_id)
-    return jsonify(serialize_company(company))
+    try:
+        fieldset = CompanyFieldset.from_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    company = company_read_query(fieldset).filter(Company.id == company_id).first_or_404()
+    return jsonify(serialize_companies([company], fieldset=fieldset)[0])
 
 # NEW: Endpoint for a company owner to get their own company details
 @companies_bp.route('/my-company', methods=['GET'])
@@ -87,11 +420,12 @@ def get_my_company(current_user):
     """
     Allows a company_owner to retrieve their own company details.
     """
-    logger.debug(f"get_my_company: current_user received: {current_user.username} (ID: {current_user.id})")
-    if not current_user.company_profile:
-        logger.warning(f"get_my_company: User '{current_user.username}' has no associated company_profile.")
+    logger.debug("get_my_company: current_user received: %s (ID: %s)", current_user.username, current_user.id)
+    company = company_read_query().filter(Company.id == current_user.company_id).first() if current_user.company_id else None
+    if not company:
+        logger.warning("get_my_company: User '%s' has no associated company_profile.", current_user.username)
         return jsonify({'error': 'No company profile found for this user'}), 404
-    return jsonify(serialize_company(current_user.company_profile))
+    return jsonify(serialize_companies([company])[0])
 
 
 # Create a new company (Admin only)
@@ -101,9 +435,8 @@ def create_company(current_user):
     current_user_id = current_user.id
 
     data = request.get_json()
-    logger.info(f"\n--- Create Company Request ---")
-    logger.info(f"Received data for creation: {data}")
-    logger.info(f"Authenticated user ID: {current_user_id}")
+    # Field names only: request bodies carry contact details and are never logged
+    logger.info("Create company request by user ID %s with fields %s", current_user_id, sorted(data or {}))
 
     name = data.get('name')
     email = data.get('email')
@@ -118,14 +451,19 @@ def create_company(current_user):
 
     region_id = data.get('region_id')
     service_ids = data.get('services', [])
-    logger.info(f"Service IDs from request: {service_ids}")
+    logger.debug("Service IDs from request: %s", service_ids)
+
+    try:
+        location = parse_location_fields(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     try:
         region = Region.query.get(region_id) if region_id else None
         
         valid_service_ids = [int(s_id) for s_id in service_ids if s_id is not None]
         services = Service.query.filter(Service.id.in_(valid_service_ids)).all() if valid_service_ids else []
-        logger.info(f"Found services for new company: {[s.name for s in services]}")
+        logger.debug("Found %d services for new company.", len(services))
 
         new_company = Company(
             name=name,
@@ -134,13 +472,21 @@ def create_company(current_user):
             description=description,
             status=status,
             region=region,
-            user=current_user # Assign the current authenticated user as the company creator
+            user_id=current_user.id, # Assign the current authenticated user as the company creator
+            **location
         )
         new_company.services = services
 
         db.session.add(new_company)
+        db.session.flush()
+        search.refresh_companies([new_company.id])
+        if new_company.status == 'approved':
+            notifications.notify_company_listed(new_company)
+        if new_company.latitude is not None:
+            bump_version(geo.LOCATIONS_VERSION)
+        bump_version('companies')
         db.session.commit()
-        logger.info(f"Company '{new_company.name}' created successfully with ID: {new_company.id}")
+        logger.info("Company '%s' created successfully with ID: %s", new_company.name, new_company.id)
         return jsonify({'message': 'Company created', 'id': new_company.id}), 201
     except IntegrityError as e:
         db.session.rollback()
@@ -152,28 +498,69 @@ def create_company(current_user):
         return jsonify({'error': f'Internal server error during creation: {str(e)}'}), 500
 
 
+# Bulk import companies from CSV or NDJSON (Admin only)
+@companies_bp.route('/import', methods=['POST'])
+@role_required(['admin'])
+def import_companies_route(current_user):
+    """
+    Accepts a multipart upload in `file` or a raw request body. The format comes from
+    ?format=csv|ndjson, else from the file name or Content-Type.
+    Returns per-row errors; valid rows are imported even when others fail.
+    """
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        fmt = request.args.get('format') or detect_format(upload.filename, upload.mimetype)
+    else:
+        stream = request.stream
+        fmt = request.args.get('format') or detect_format(content_type=request.mimetype)
+    if fmt not in FORMATS:
+        return jsonify({'error': 'Unknown import format. Use ?format=csv or ?format=ndjson'}), 400
+
+    try:
+        report = import_companies(stream, fmt, created_by_user_id=current_user.id)
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'Import file must be UTF-8 encoded'}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Unexpected error during company import:")
+        return jsonify({'error': f'Internal server error during import: {str(e)}'}), 500
+
+    logger.info("Admin '%s' imported %s companies (%s rows failed).", current_user.username, report['created'], report['failed'])
+    return jsonify(report), 200
+
+
 # Update a company (protected by role and ownership)
 @companies_bp.route('/<int:company_id>', methods=['PUT'])
 @role_required(['admin', 'company_owner'])
 def update_company(company_id, current_user):
-    logger.info(f"\n--- Update Company Request ---")
-    logger.info(f"Update request for company ID: {company_id} by user '{current_user.username}' (ID: {current_user.id}, Role: {current_user.role})")
+    logger.info("Update request for company ID: %s by user '%s' (ID: %s, Role: %s)", company_id, current_user.username, current_user.id, current_user.role)
 
     company = Company.query.get(company_id)
     if not company:
-        logger.warning(f"Company ID {company_id} not found for update.")
+        logger.warning("Company ID %s not found for update.", company_id)
         return jsonify({'error': 'Company not found'}), 404
 
     # CRITICAL: Ownership check for company_owner role
     if current_user.role == 'company_owner':
-        if not current_user.company_profile or current_user.company_profile.id != company_id:
-            logger.warning(f"Access Denied: Company owner '{current_user.username}' attempted to update company ID {company_id}, which they do not own.")
+        if current_user.company_id != company_id:
+            logger.warning("Access Denied: Company owner '%s' attempted to update company ID %s, which they do not own.", current_user.username, company_id)
             return jsonify({'msg': 'Access Denied: You can only update your own company'}), 403
 
     data = request.get_json()
-    logger.info(f"Received update data: {data}")
+    logger.info("Update fields for company ID %s: %s", company_id, sorted(data or {}))
+
+    try:
+        location = parse_location_fields(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     try:
+        if geo.location_changed(company, location):
+            bump_version(geo.LOCATIONS_VERSION)
+        for field, value in location.items():
+            setattr(company, field, value)
         company.name = data.get('name', company.name)
         company.email = data.get('email', company.email)
         company.phone = data.get('phone', company.phone)
@@ -185,20 +572,27 @@ def update_company(company_id, current_user):
         if region_id is not None:
             region = Region.query.get(region_id) if region_id else None
             if region_id and not region:
-                logger.warning(f"Invalid region_id {region_id} provided for update.")
+                logger.warning("Invalid region_id %s provided for update.", region_id)
                 return jsonify({'error': 'Invalid region_id'}), 400
             company.region = region
-            logger.info(f"Updated region to: {region.name if region else 'None'}")
+            logger.debug("Updated region to ID: %s", region_id or None)
 
         service_ids = data.get('services')
+        added_service_ids = set()
         if service_ids is not None:
             valid_service_ids = [int(s_id) for s_id in service_ids if s_id is not None]
             services = Service.query.filter(Service.id.in_(valid_service_ids)).all() if valid_service_ids else []
+            previous_service_ids = {s.id for s in company.services}
             company.services = services
-            logger.info(f"Updated services to: {[s.name for s in services]}")
+            added_service_ids = {s.id for s in services} - previous_service_ids
+            logger.debug("Updated services to IDs: %s", [s.id for s in services])
 
+        db.session.flush()
+        search.refresh_companies([company.id])
+        notifications.notify_new_services(company, added_service_ids)
+        bump_version('companies')
         db.session.commit()
-        logger.info(f"Company ID {company_id} updated successfully.")
+        logger.info("Company ID %s updated successfully.", company_id)
         return jsonify({'message': 'Company updated successfully', 'company': serialize_company(company)})
     except IntegrityError as e:
         db.session.rollback()
@@ -220,13 +614,20 @@ def update_company_status(company_id, current_user):
     data = request.get_json()
     new_status = data.get('status')
 
-    if not new_status or new_status not in ['pending', 'approved', 'rejected']:
+    if not new_status or new_status not in COMPANY_STATUSES:
         return jsonify({'error': 'Invalid status provided. Must be "pending", "approved", or "rejected"'}), 400
 
     try:
-        company.status = new_status
+        if new_status != company.status:
+            company.status = new_status
+            if company.latitude is not None:
+                bump_version(geo.LOCATIONS_VERSION)
+            notifications.notify_status_change([company.id], new_status)
+            if new_status == 'approved':
+                notifications.notify_company_listed(company)
+        bump_version('companies')
         db.session.commit()
-        logger.info(f"Admin '{current_user.username}' updated status of Company ID {company_id} to '{new_status}'.")
+        logger.info("Admin '%s' updated status of Company ID %s to '%s'.", current_user.username, company_id, new_status)
         return jsonify({'message': f'Company status updated to {new_status}', 'company': serialize_company(company)}), 200
     except Exception as e:
         db.session.rollback()
@@ -234,23 +635,96 @@ def update_company_status(company_id, current_user):
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
 
+# Admin-only bulk moderation: one UPDATE for many companies
+@companies_bp.route('/status', methods=['PUT'])
+@role_required(['admin'])
+def bulk_update_company_status(current_user):
+    """
+    Sets the status of many companies in one transaction. Body:
+      {"status": "approved", "ids": [1, 2, 3]}
+    or, to select by the same filters as the list endpoint:
+      {"status": "approved", "filter": {"status": "pending", "region_id": 4}}
+    """
+    data = request.get_json() or {}
+    new_status = data.get('status')
+
+    if not new_status or new_status not in COMPANY_STATUSES:
+        return jsonify({'error': 'Invalid status provided. Must be "pending", "approved", or "rejected"'}), 400
+
+    ids = data.get('ids')
+    filters = data.get('filter')
+    if (ids is None) == (filters is None):
+        return jsonify({'error': 'Provide exactly one of "ids" or "filter"'}), 400
+
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({'error': '"ids" must be a list of integers'}), 400
+        if len(ids) > MAX_BULK_STATUS_IDS:
+            return jsonify({'error': f'At most {MAX_BULK_STATUS_IDS} ids per request'}), 400
+        criteria = [Company.id.in_(set(ids))]
+    else:
+        if not isinstance(filters, dict) or not filters:
+            return jsonify({'error': '"filter" must be a non-empty object'}), 400
+        try:
+            criteria = company_filters(filters)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not criteria:
+            return jsonify({'error': 'Filter must contain status, region_id or service_id'}), 400
+
+    try:
+        # Owners of the companies whose status changes; residents only hear about single approvals
+        notifications.notify_status_change(
+            select(Company.id).where(*criteria, Company.status != new_status), new_status
+        )
+        stmt = update(Company).where(*criteria).values(status=new_status)
+        if db.session.get_bind().dialect.update_returning:
+            updated = sorted(db.session.execute(
+                stmt.returning(Company.id), execution_options={'synchronize_session': False}
+            ).scalars())
+        else:
+            updated = sorted(db.session.scalars(select(Company.id).where(*criteria)))
+            db.session.execute(stmt, execution_options={'synchronize_session': False})
+        if updated:
+            bump_version(geo.LOCATIONS_VERSION)
+        bump_version('companies')
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error during bulk company status update:")
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+
+    logger.info("Admin '%s' set status '%s' on %s companies.", current_user.username, new_status, len(updated))
+    result = {'status': new_status, 'updated': updated}
+    if ids is not None:
+        found = set(updated)
+        result['not_found'] = sorted(i for i in set(ids) if i not in found)
+    return jsonify(result), 200
+
+
 # Delete a company (protected by role)
 @companies_bp.route('/<int:company_id>', methods=['DELETE'])
 @role_required(['admin']) # Only admin can delete companies (already correct)
 def delete_company(company_id, current_user):
-    logger.info(f"\n--- Delete Company Request ---")
-    logger.info(f"Delete request for company ID: {company_id} by user '{current_user.username}' (ID: {current_user.id}, Role: {current_user.role})")
+    logger.info("Delete request for company ID: %s by user '%s' (ID: %s, Role: %s)", company_id, current_user.username, current_user.id, current_user.role)
 
     try:
         company = Company.query.get(company_id)
 
         if not company:
-            logger.warning(f"Company ID {company_id} not found for deletion.")
+            logger.warning("Company ID %s not found for deletion.", company_id)
             return jsonify({'error': 'Company not found'}), 404
 
+        if company.login_user is not None:
+            # The owner's token claims still name the deleted company
+            user_cache.invalidate(company.login_user.id)
+        if company.latitude is not None:
+            bump_version(geo.LOCATIONS_VERSION)
         db.session.delete(company)
+        search.remove_companies([company_id])
+        bump_version('companies')
         db.session.commit()
-        logger.info(f"Company ID {company_id} deleted successfully.")
+        logger.info("Company ID %s deleted successfully.", company_id)
         return jsonify({'message': 'Company deleted successfully'}), 200
 
     except IntegrityError as e:
@@ -261,5 +735,5 @@ def delete_company(company_id, current_user):
         }), 400
     except Exception as e:
         db.session.rollback()
-        logger.exception(f"An unexpected error occurred during company deletion for ID {company_id}:")
+        logger.exception("An unexpected error occurred during company deletion for ID %s:", company_id)
         return jsonify({'error': 'Internal server error during deletion. Check server logs for details.'}), 500
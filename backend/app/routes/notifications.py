@@ -1,26 +1,131 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+# backend/app/routes/notifications.py
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import select
+import base64
+import logging
+
+from ..models import Notification, User, db
+from .. import notifications
+from ..authz import login_required, role_required
+from ..sqlstats import query_budget
+
+logger = logging.getLogger(__name__)
 
 notifications_bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
 
-# Example: Get notifications for the logged-in user
+def serialize_notification(notification):
+    return {
+        'id': notification.id,
+        'kind': notification.kind,
+        'message': notification.message,
+        'company_id': notification.company_id,
+        'created_at': notification.created_at,
+        'read_at': notification.read_at,
+    }
+
+def encode_cursor(notification):
+    """
+    Opaque keyset cursor pointing just past `notification` (pages are newest first, by id).
+    """
+    return base64.urlsafe_b64encode(str(notification.id).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor. Raises ValueError for anything that was not produced by it.
+    """
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+# Budgets allow two queries more than the view itself issues, for app/authz.py: the first time a
+# worker sees a caller it reads their claims version, and loads the user if the token predates it
+
+# Notifications of the logged-in user, newest first
 @notifications_bp.route('/', methods=['GET'])
-@jwt_required()
-def get_notifications():
-    user_id = get_jwt_identity()
-    # This is just a stub response
-    notifications = [
-        {"id": 1, "message": "Your company profile was updated.", "user_id": user_id},
-        {"id": 2, "message": "New service added in your region.", "user_id": user_id}
-    ]
-    return jsonify(notifications)
-
-# Example: Send a test notification (would be expanded later)
+@login_required
+@query_budget(4)
+def get_notifications(current_user):
+    """
+    One page of the user's notifications plus `next_cursor` and `unread_count`.
+    ?limit= (NOTIFICATIONS_PAGE_SIZE by default), ?cursor= from the previous page, ?unread=1.
+    """
+    user_id = current_user.id
+    try:
+        limit = int(request.args.get('limit', current_app.config['NOTIFICATIONS_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, current_app.config['NOTIFICATIONS_MAX_PAGE_SIZE']))
+
+    criteria = [Notification.user_id == user_id]
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            criteria.append(Notification.id < decode_cursor(cursor))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    if request.args.get('unread', '').lower() in ('1', 'true', 'yes', 'on'):
+        criteria.append(Notification.read_at.is_(None))
+
+    unread_count = db.session.scalar(select(User.unread_count).where(User.id == user_id))
+    if unread_count is None:
+        return jsonify({'error': 'User not found'}), 404
+    # Fetch one extra row to know whether another page follows
+    page = db.session.scalars(
+        select(Notification).where(*criteria).order_by(Notification.id.desc()).limit(limit + 1)
+    ).all()
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return jsonify({
+        'notifications': [serialize_notification(n) for n in page[:limit]],
+        'next_cursor': next_cursor,
+        'unread_count': unread_count
+    })
+
+# Badge polling: a single primary-key lookup
+@notifications_bp.route('/unread-count', methods=['GET'])
+@login_required
+@query_budget(3)
+def get_unread_count(current_user):
+    unread_count = db.session.scalar(select(User.unread_count).where(User.id == current_user.id))
+    if unread_count is None:
+        return jsonify({'error': 'User not found'}), 404
+    return jsonify({'unread_count': unread_count})
+
+# Mark notifications read: {"ids": [1, 2]} or {"all": true}
+@notifications_bp.route('/read', methods=['POST'])
+@login_required
+def mark_notifications_read(current_user):
+    user_id = current_user.id
+    data = request.get_json() or {}
+    ids = data.get('ids')
+    if ids is None and data.get('all') is not True:
+        return jsonify({'error': 'Provide "ids" or "all": true'}), 400
+    if ids is not None and (not isinstance(ids, list)
+                            or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+        return jsonify({'error': '"ids" must be a list of integers'}), 400
+
+    try:
+        marked = notifications.mark_read(user_id, ids)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error marking notifications read:")
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
+    unread_count = db.session.scalar(select(User.unread_count).where(User.id == user_id))
+    return jsonify({'marked': marked, 'unread_count': unread_count})
+
+# Send a test notification to yourself (admins only: it writes notifications on demand)
 @notifications_bp.route('/send-test', methods=['POST'])
-@jwt_required()
-def send_test_notification():
-    user_id = get_jwt_identity()
-    data = request.get_json()
-    message = data.get("message", "This is a test notification.")
-    # In real app, you'd save to DB or push notification here
+@role_required(['admin'])
+def send_test_notification(current_user):
+    user_id = current_user.id
+    data = request.get_json(silent=True) or {}
+    message = data.get("message") or "This is a test notification."
+    try:
+        notifications.fan_out('test', str(message), User.id == user_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Error sending test notification:")
+        return jsonify({'error': f'Internal server error: {str(e)}'}), 500
     return jsonify({"msg": f"Notification sent to user {user_id}: {message}"})
@@ -1,47 +1,18 @@
 # backend/app/routes/regions.py
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 import logging
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from functools import wraps
-from flask_jwt_extended import jwt_required, get_jwt_identity # <--- ADDED: Import jwt_required and get_jwt_identity
 
-from ..models import Region, User, db
+from ..models import Company, Region, Service, company_service_association, db
+from .. import search
+from ..authz import role_required
+from ..caching import bump_version, conditional
+from ..sqlstats import query_budget
+from .companies import COMPANY_STATUSES, company_read_query, serialize_companies
 
 logger = logging.getLogger(__name__)
 
-# Custom decorator for role-based access control (copied for self-containment)
-# This should ideally be in a shared utility file if used across multiple blueprints
-def role_required(allowed_roles):
-    """
-    Decorator to restrict access to a route based on user roles.
-    Requires @jwt_required() to be applied before this decorator.
-    """
-    def decorator(fn):
-        @wraps(fn)
-        @jwt_required() # Ensure JWT is required first
-        def wrapper(*args, **kwargs):
-            current_user_id_str = get_jwt_identity()
-            try:
-                current_user_id = int(current_user_id_str)
-            except (ValueError, TypeError):
-                logger.error(f"Invalid user ID in token: {current_user_id_str}")
-                return jsonify({'msg': 'Invalid user identity in token'}), 401
-
-            user = User.query.get(current_user_id)
-            if not user:
-                logger.error(f"User ID {current_user_id} from token not found in DB.")
-                return jsonify({'msg': 'User not found'}), 404
-
-            logger.info(f"Role Check: User '{user.username}' (ID: {user.id}) has role: '{user.role}'. Allowed roles: {allowed_roles}")
-
-            if user.role not in allowed_roles:
-                logger.warning(f"Access Denied: User '{user.username}' (role: {user.role}) attempted to access restricted resource. Allowed roles: {allowed_roles}")
-                return jsonify({'msg': 'Access Denied: Insufficient permissions'}), 403 # Forbidden
-            
-            return fn(*args, **kwargs)
-        return wrapper
-    return decorator
-
 # Helper function to serialize a region
 def serialize_region(region):
     return {
@@ -54,6 +25,7 @@ regions_bp = Blueprint('regions', __name__, url_prefix='/api/regions')
 
 # Get all regions (Publicly accessible for dropdowns, etc.)
 @regions_bp.route('/', methods=['GET'])
+@conditional('regions')
 def get_regions():
     """
     Retrieves all regions from the database.
@@ -65,18 +37,66 @@ def get_regions():
 
 # Get region by ID (Publicly accessible)
 @regions_bp.route('/<int:region_id>', methods=['GET'])
+@conditional('regions')
 def get_region(region_id):
     """
     Retrieves a single region by its ID.
     """
-    logger.info(f"Fetching region with ID: {region_id}")
+    logger.info("Fetching region with ID: %s", region_id)
     region = Region.query.get_or_404(region_id)
     return jsonify(serialize_region(region))
 
+# Companies offering a service in a region, e.g. approved recyclers in Kisumu (Publicly accessible)
+@regions_bp.route('/<int:region_id>/services/<int:service_id>/companies', methods=['GET'])
+@conditional('companies', 'regions', 'services', 'users')
+@query_budget(4)
+def get_region_service_companies(region_id, service_id):
+    """
+    Pages through companies in `region_id` offering `service_id`, by ascending id.
+    ?status= defaults to approved; ?limit= and ?cursor= (the previous page's next_cursor) page.
+    The matching ids come from ix_companies_region_id_status_id joined with
+    ix_company_service_service_id_company_id; only the final page of companies is loaded.
+    """
+    status = request.args.get('status', 'approved')
+    if status not in COMPANY_STATUSES:
+        return jsonify({'error': 'Invalid status filter. Must be "pending", "approved", or "rejected"'}), 400
+    try:
+        limit = int(request.args.get('limit', current_app.config['COMPANIES_PAGE_SIZE']))
+        after_id = int(request.args.get('cursor', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and cursor must be integers'}), 400
+    limit = max(1, min(limit, current_app.config['COMPANIES_MAX_PAGE_SIZE']))
+
+    link = company_service_association.c
+    company_ids = db.session.scalars(
+        select(link.company_id)
+        .join(Company, Company.id == link.company_id)
+        .where(
+            link.service_id == service_id,
+            Company.region_id == region_id,
+            Company.status == status,
+            link.company_id > after_id
+        )
+        .order_by(link.company_id)
+        .limit(limit + 1)
+    ).all()
+
+    if not company_ids and not after_id:
+        # Tell an empty result apart from an unknown region or service
+        if not db.session.get(Region, region_id) or not db.session.get(Service, service_id):
+            return jsonify({'error': 'Region or service not found'}), 404
+
+    page_ids = company_ids[:limit]
+    companies = company_read_query().filter(Company.id.in_(page_ids)).order_by(Company.id).all() if page_ids else []
+    return jsonify({
+        'companies': serialize_companies(companies, company_ids=page_ids),
+        'next_cursor': str(page_ids[-1]) if len(company_ids) > limit else None
+    })
+
 # Create a new region (Admin only)
 @regions_bp.route('/', methods=['POST'])
 @role_required(['admin']) # Only admin can create regions
-def create_region():
+def create_region(current_user):
     """
     Creates a new region. Admin access required.
     """
@@ -90,8 +110,9 @@ def create_region():
     try:
         new_region = Region(name=name, description=description)
         db.session.add(new_region)
+        bump_version('regions')
         db.session.commit()
-        logger.info(f"Region '{new_region.name}' created successfully with ID: {new_region.id}")
+        logger.info("Region '%s' created successfully with ID: %s", new_region.name, new_region.id)
         return jsonify({'message': 'Region created', 'id': new_region.id}), 201
     except IntegrityError as e:
         db.session.rollback()
@@ -105,7 +126,7 @@ def create_region():
 # Update an existing region (Admin only)
 @regions_bp.route('/<int:region_id>', methods=['PUT'])
 @role_required(['admin']) # Only admin can update regions
-def update_region(region_id):
+def update_region(region_id, current_user):
     """
     Updates an existing region by its ID. Admin access required.
     """
@@ -119,10 +140,15 @@ def update_region(region_id):
         return jsonify({'error': 'Region name is required'}), 400
 
     try:
+        name_changed = name != region.name
         region.name = name
         region.description = description
+        if name_changed:
+            db.session.flush()
+            search.refresh_companies([c.id for c in Company.query.filter_by(region_id=region_id).with_entities(Company.id)])
+        bump_version('regions')
         db.session.commit()
-        logger.info(f"Region ID {region_id} updated successfully.")
+        logger.info("Region ID %s updated successfully.", region_id)
         return jsonify({'message': 'Region updated', 'region': serialize_region(region)}), 200
     except IntegrityError as e:
         db.session.rollback()
@@ -136,15 +162,19 @@ def update_region(region_id):
 # Delete a region (Admin only)
 @regions_bp.route('/<int:region_id>', methods=['DELETE'])
 @role_required(['admin']) # Only admin can delete regions
-def delete_region(region_id):
+def delete_region(region_id, current_user):
     """
     Deletes a region by its ID. Admin access required.
     """
     region = Region.query.get_or_404(region_id)
     try:
+        company_ids = [c.id for c in Company.query.filter_by(region_id=region_id).with_entities(Company.id)]
         db.session.delete(region)
+        db.session.flush()
+        search.refresh_companies(company_ids)
+        bump_version('regions')
         db.session.commit()
-        logger.info(f"Region ID {region_id} deleted successfully.")
+        logger.info("Region ID %s deleted successfully.", region_id)
         return jsonify({'message': 'Region deleted'}), 200
     except IntegrityError as e:
         db.session.rollback()
@@ -1,49 +1,17 @@
 # backend/app/routes/services.py
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError
 import traceback
 import logging
-from functools import wraps # Import wraps for decorators
 
-from ..models import Service, User, db # Import Service and User models
-# Assuming role_required is available from a common utility or companies.py
-# For now, we'll copy it here for self-containment, but ideally it's in a shared module.
+from ..models import Service, company_service_association, db # Import Service model
+from .. import search
+from ..authz import role_required
+from ..caching import bump_version, conditional
+from ..streaming import STREAM_BATCH_SIZE, stream_json_array, wants_stream
 
 logger = logging.getLogger(__name__)
 
-# Custom decorator for role-based access control (copied for self-containment)
-def role_required(allowed_roles):
-    """
-    Decorator to restrict access to a route based on user roles.
-    Requires @jwt_required() to be applied before this decorator.
-    """
-    def decorator(fn):
-        @wraps(fn)
-        @jwt_required()
-        def wrapper(*args, **kwargs):
-            current_user_id_str = get_jwt_identity()
-            try:
-                current_user_id = int(current_user_id_str)
-            except (ValueError, TypeError):
-                logger.error(f"Invalid user ID in token: {current_user_id_str}")
-                return jsonify({'msg': 'Invalid user identity in token'}), 401
-
-            user = User.query.get(current_user_id)
-            if not user:
-                logger.error(f"User ID {current_user_id} from token not found in DB.")
-                return jsonify({'msg': 'User not found'}), 404
-
-            logger.info(f"Role Check: User '{user.username}' (ID: {user.id}) has role: '{user.role}'. Allowed roles: {allowed_roles}")
-
-            if user.role not in allowed_roles:
-                logger.warning(f"Access Denied: User '{user.username}' (role: {user.role}) attempted to access restricted resource. Allowed roles: {allowed_roles}")
-                return jsonify({'msg': 'Access Denied: Insufficient permissions'}), 403 # Forbidden
-            
-            return fn(*args, **kwargs)
-        return wrapper
-    return decorator
-
 # Helper function to serialize a service
 def serialize_service(service):
     return {
@@ -54,17 +22,26 @@ def serialize_service(service):
         # 'companies': [{'id': c.id, 'name': c.name} for c in service.companies]
     }
 
+def _company_ids_for_service(service_id):
+    # Companies whose search document mentions this service
+    return [row.company_id for row in db.session.query(company_service_association.c.company_id)
+            .filter(company_service_association.c.service_id == service_id)]
+
 services_bp = Blueprint('services', __name__, url_prefix='/api/services')
 
 # Get all services
 @services_bp.route('/', methods=['GET'])
+@conditional('services')
 def get_services():
+    if wants_stream():
+        return stream_json_array(serialize_service(s) for s in Service.query.yield_per(STREAM_BATCH_SIZE))
     services = Service.query.all()
     results = [serialize_service(s) for s in services]
     return jsonify(results)
 
 # Get service by ID
 @services_bp.route('/<int:service_id>', methods=['GET'])
+@conditional('services')
 def get_service(service_id):
     service = Service.query.get_or_404(service_id)
     return jsonify(serialize_service(service))
@@ -72,7 +49,7 @@ def get_service(service_id):
 # Create a new service (Admin only)
 @services_bp.route('/', methods=['POST'])
 @role_required(['admin']) # Only admin can create services
-def create_service():
+def create_service(current_user):
     data = request.get_json()
     name = data.get('name')
     description = data.get('description')
@@ -83,8 +60,9 @@ def create_service():
     try:
         new_service = Service(name=name, description=description)
         db.session.add(new_service)
+        bump_version('services')
         db.session.commit()
-        logger.info(f"Service '{new_service.name}' created successfully with ID: {new_service.id}")
+        logger.info("Service '%s' created successfully with ID: %s", new_service.name, new_service.id)
         return jsonify({'message': 'Service created', 'id': new_service.id}), 201
     except IntegrityError as e:
         db.session.rollback()
@@ -98,7 +76,7 @@ def create_service():
 # Update a service (Admin only)
 @services_bp.route('/<int:service_id>', methods=['PUT'])
 @role_required(['admin']) # Only admin can update services
-def update_service(service_id):
+def update_service(service_id, current_user):
     service = Service.query.get_or_404(service_id)
     data = request.get_json()
 
@@ -109,10 +87,15 @@ def update_service(service_id):
         return jsonify({'error': 'Service name is required'}), 400
 
     try:
+        name_changed = name != service.name
         service.name = name
         service.description = description
+        if name_changed:
+            db.session.flush()
+            search.refresh_companies(_company_ids_for_service(service_id))
+        bump_version('services')
         db.session.commit()
-        logger.info(f"Service ID {service_id} updated successfully.")
+        logger.info("Service ID %s updated successfully.", service_id)
         return jsonify({'message': 'Service updated', 'service': serialize_service(service)}), 200
     except IntegrityError as e:
         db.session.rollback()
@@ -126,12 +109,16 @@ def update_service(service_id):
 # Delete a service (Admin only)
 @services_bp.route('/<int:service_id>', methods=['DELETE'])
 @role_required(['admin']) # Only admin can delete services
-def delete_service(service_id):
+def delete_service(service_id, current_user):
     service = Service.query.get_or_404(service_id)
     try:
+        company_ids = _company_ids_for_service(service_id)
         db.session.delete(service)
+        db.session.flush()
+        search.refresh_companies(company_ids)
+        bump_version('services')
         db.session.commit()
-        logger.info(f"Service ID {service_id} deleted successfully.")
+        logger.info("Service ID %s deleted successfully.", service_id)
         return jsonify({'message': 'Service deleted'}), 200
     except IntegrityError as e:
         db.session.rollback()
@@ -1,49 +1,18 @@
 # backend/app/routes/users.py
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 import logging
 import traceback
-from functools import wraps # Needed for role_required decorator
 
-from ..models import User, db # Import User model and db
+from ..models import Region, User, db # Import User model and db
+from ..authz import role_required
+from ..caching import bump_version
+from ..streaming import STREAM_BATCH_SIZE, stream_json_array, wants_stream
 
 logger = logging.getLogger(__name__)
 
-# Re-define role_required here or import from a common utility if it exists elsewhere
-# For simplicity, keeping it here for now as it's used in this file.
-def role_required(allowed_roles):
-    """
-    Decorator to restrict access to a route based on user roles.
-    Requires @jwt_required() to be applied before this decorator.
-    """
-    def decorator(fn):
-        @wraps(fn)
-        @jwt_required()
-        def wrapper(*args, **kwargs):
-            current_user_id_str = get_jwt_identity()
-            try:
-                current_user_id = int(current_user_id_str)
-            except (ValueError, TypeError):
-                logger.error(f"Invalid user ID in token: {current_user_id_str}")
-                return jsonify({'msg': 'Invalid user identity in token'}), 401
-
-            user = User.query.get(current_user_id)
-            if not user:
-                logger.error(f"User ID {current_user_id} from token not found in DB.")
-                return jsonify({'msg': 'User not found'}), 404
-
-            logger.info(f"Role Check: User '{user.username}' (ID: {user.id}) has role: '{user.role}'. Allowed roles: {allowed_roles}")
-
-            if user.role not in allowed_roles:
-                logger.warning(f"Access Denied: User '{user.username}' (role: {user.role}) attempted to access restricted resource. Allowed roles: {allowed_roles}")
-                return jsonify({'msg': 'Access Denied: Insufficient permissions'}), 403 # Forbidden
-            
-            kwargs['current_user'] = user 
-            return fn(*args, **kwargs)
-        return wrapper
-    return decorator
-
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
 @users_bp.route('/me', methods=['GET'])
@@ -62,13 +31,15 @@ def get_my_profile():
         'id': user.id,
         'username': user.username,
         'email': user.email,
-        'role': user.role
+        'role': user.role,
+        'region_id': user.region_id,
+        'unread_count': user.unread_count
     }
     # If the user is a company owner, include their company_id
     if user.role == 'company_owner' and user.company_profile:
         user_data['company_id'] = user.company_profile.id
 
-    logger.info(f"User '{user.username}' fetched their profile.")
+    logger.info("User '%s' fetched their profile.", user.username)
     return jsonify(user_data)
 
 @users_bp.route('/me', methods=['PUT'])
@@ -90,24 +61,36 @@ def update_my_profile():
 
     # Update username if provided and unique
     if new_username and new_username != user.username:
-        if User.query.filter(User.username == new_username, User.id != user.id).first():
+        if User.query.filter(func.lower(User.username) == new_username.lower(), User.id != user.id).first():
             return jsonify({'error': 'Username already taken'}), 409
         user.username = new_username
-        logger.info(f"User ID {user.id} updated username to {new_username}.")
+        # Company listings show their creator's username
+        bump_version('users')
+        logger.info("User ID %s updated username to %s.", user.id, new_username)
 
     # Update email if provided and unique
     if new_email and new_email != user.email:
-        if User.query.filter(User.email == new_email, User.id != user.id).first():
+        if User.query.filter(func.lower(User.email) == new_email.lower(), User.id != user.id).first():
             return jsonify({'error': 'Email already taken'}), 409
         user.email = new_email
-        logger.info(f"User ID {user.id} updated email to {new_email}.")
+        logger.info("User ID %s updated email to %s.", user.id, new_email)
+
+    # Region the user lives in (null to clear); residents are notified about companies there
+    if 'region_id' in data and data['region_id'] != user.region_id:
+        region_id = data['region_id']
+        if region_id is not None and (isinstance(region_id, bool) or not isinstance(region_id, int)
+                                      or db.session.get(Region, region_id) is None):
+            return jsonify({'error': 'Invalid region_id'}), 400
+        user.region_id = region_id
+        logger.info("User ID %s updated region to %s.", user.id, region_id)
 
     # Update password if provided
     if new_password:
         user.set_password(new_password)
-        logger.info(f"User ID {user.id} updated password.")
+        logger.info("User ID %s updated password.", user.id)
 
     try:
+        # A username change bumps the user's claims version as it commits (see app/authz.py)
         db.session.commit()
         return jsonify({'message': 'Profile updated successfully'}), 200
     except IntegrityError as e:
@@ -124,5 +107,8 @@ def update_my_profile():
 @users_bp.route('/', methods=['GET'])
 @role_required(['admin'])
 def get_all_users(current_user): # Admin can get all users
+    if wants_stream():
+        rows = db.session.query(User.id, User.username, User.email, User.role).yield_per(STREAM_BATCH_SIZE)
+        return stream_json_array({'id': u.id, 'username': u.username, 'email': u.email, 'role': u.role} for u in rows)
     users = User.query.all()
     return jsonify([{'id': u.id, 'username': u.username, 'email': u.email, 'role': u.role} for u in users])
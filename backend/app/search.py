@@ -0,0 +1,206 @@
+# backend/app/search.py
+"""
+Full-text index over companies (name, region name, service names, description).
+
+PostgreSQL keeps a weighted `companies.search_vector` tsvector column behind a GIN index.
+SQLite, used for local development, keeps an FTS5 virtual table `companies_fts` whose rowid is
+the company id. Neither is mapped on the Company model: both are maintained here with plain
+SQL, so callers only have to tell this module which companies changed, inside the same
+transaction as the change.
+
+The migration creates them; for databases built with db.create_all() (tests, benchmarks),
+create_index() does, and so does `flask search-reindex`. Requests never change the schema: they
+only check that the index exists (once per engine) and, while it does not, skip the refresh
+and fall back to LIKE matching, logging a warning.
+"""
+import logging
+import re
+import weakref
+
+from sqlalchemy import bindparam, or_, select, text
+
+from .extensions import db
+from .models import Company
+
+logger = logging.getLogger(__name__)
+
+# Large refreshes (a renamed service, a full reindex) are split so SQLite stays under its
+# bound-parameter limit.
+REFRESH_CHUNK_SIZE = 1000
+
+# Name matches rank above region/service matches, which rank above description matches.
+_PG_VECTOR = """
+    setweight(to_tsvector('simple', coalesce(companies.name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce((
+        SELECT regions.name FROM regions WHERE regions.id = companies.region_id
+    ), '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce((
+        SELECT string_agg(services.name, ' ')
+        FROM services
+        JOIN company_service_association csa ON csa.service_id = services.id
+        WHERE csa.company_id = companies.id
+    ), '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(companies.description, '')), 'C')
+"""
+
+_SQLITE_ROWS = """
+    SELECT companies.id,
+           companies.name,
+           coalesce((SELECT regions.name FROM regions WHERE regions.id = companies.region_id), ''),
+           coalesce((
+               SELECT group_concat(services.name, ' ')
+               FROM services
+               JOIN company_service_association csa ON csa.service_id = services.id
+               WHERE csa.company_id = companies.id
+           ), ''),
+           coalesce(companies.description, '')
+    FROM companies
+"""
+
+# Column weights for bm25(), in companies_fts column order: name, region, services, description
+_SQLITE_BM25 = "bm25(companies_fts, 10.0, 5.0, 5.0, 1.0)"
+
+# Engines whose search column / FTS table is known to exist
+_index_ready = weakref.WeakSet()
+
+_INDEX_EXISTS = {
+    'postgresql': "SELECT 1 FROM information_schema.columns WHERE table_schema = current_schema() "
+                  "AND table_name = 'companies' AND column_name = 'search_vector'",
+    'sqlite': "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'companies_fts'",
+}
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def index_available():
+    """
+    Whether the search column / FTS table exists. Only a positive answer is cached, so an index
+    created later (by `flask search-reindex`) is picked up without a restart.
+    """
+    engine = db.session.get_bind()
+    if engine in _index_ready:
+        return True
+    if db.session.execute(text(_INDEX_EXISTS[engine.dialect.name])).first() is None:
+        logger.warning("The company search index does not exist; run `flask search-reindex` to build it.")
+        return False
+    _index_ready.add(engine)
+    return True
+
+
+def create_index():
+    """
+    Creates the search column and index (PostgreSQL) or FTS table (SQLite) if missing. They start
+    out empty: follow with refresh_companies(). Not for request handlers: on PostgreSQL this
+    takes an exclusive lock on companies.
+    """
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        db.session.execute(text("ALTER TABLE companies ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_companies_search_vector ON companies USING gin (search_vector)"
+        ))
+    elif dialect == 'sqlite':
+        db.session.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts "
+            "USING fts5(name, region, services, description, tokenize='unicode61 remove_diacritics 2')"
+        ))
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        yield ids[start:start + REFRESH_CHUNK_SIZE]
+
+
+def refresh_companies(company_ids=None):
+    """
+    Recomputes the search document of the given companies (all companies when None).
+    Must be called after the changes are flushed and before the commit.
+    """
+    dialect = _dialect()
+    if dialect in _INDEX_EXISTS and not index_available():
+        return
+    if dialect == 'postgresql':
+        if company_ids is None:
+            db.session.execute(text(f"UPDATE companies SET search_vector = {_PG_VECTOR}"))
+            return
+        stmt = text(
+            f"UPDATE companies SET search_vector = {_PG_VECTOR} WHERE companies.id IN :ids"
+        ).bindparams(bindparam('ids', expanding=True))
+        for chunk in _chunks(company_ids):
+            db.session.execute(stmt, {'ids': chunk})
+    elif dialect == 'sqlite':
+        if company_ids is None:
+            db.session.execute(text("DELETE FROM companies_fts"))
+            db.session.execute(text(
+                f"INSERT INTO companies_fts (rowid, name, region, services, description) {_SQLITE_ROWS}"
+            ))
+            return
+        delete_stmt = text("DELETE FROM companies_fts WHERE rowid IN :ids").bindparams(
+            bindparam('ids', expanding=True))
+        insert_stmt = text(
+            f"INSERT INTO companies_fts (rowid, name, region, services, description) "
+            f"{_SQLITE_ROWS} WHERE companies.id IN :ids"
+        ).bindparams(bindparam('ids', expanding=True))
+        for chunk in _chunks(company_ids):
+            db.session.execute(delete_stmt, {'ids': chunk})
+            db.session.execute(insert_stmt, {'ids': chunk})
+
+
+def remove_companies(company_ids):
+    """
+    Drops deleted companies from the index. On PostgreSQL the vector goes with the row.
+    """
+    if _dialect() != 'sqlite' or not index_available():
+        return
+    stmt = text("DELETE FROM companies_fts WHERE rowid IN :ids").bindparams(bindparam('ids', expanding=True))
+    for chunk in _chunks(company_ids):
+        db.session.execute(stmt, {'ids': chunk})
+
+
+def search_company_ids(query, limit, status=None):
+    """
+    Returns the ids of companies matching every word of `query` (as prefixes), best match first.
+    """
+    terms = re.findall(r'\w+', query.lower())
+    if not terms:
+        return []
+
+    dialect = _dialect()
+    if dialect in _INDEX_EXISTS and not index_available():
+        dialect = None
+    params = {'limit': limit}
+    status_clause = ''
+    if status:
+        params['status'] = status
+        status_clause = 'AND companies.status = :status'
+
+    if dialect == 'postgresql':
+        params['q'] = ' & '.join(f'{t}:*' for t in terms)
+        stmt = text(
+            "SELECT companies.id FROM companies, to_tsquery('simple', :q) AS query "
+            f"WHERE companies.search_vector @@ query {status_clause} "
+            "ORDER BY ts_rank_cd(companies.search_vector, query) DESC, companies.id "
+            "LIMIT :limit"
+        )
+    elif dialect == 'sqlite':
+        params['q'] = ' '.join(f'"{t}"*' for t in terms)
+        stmt = text(
+            "SELECT companies_fts.rowid FROM companies_fts "
+            "JOIN companies ON companies.id = companies_fts.rowid "
+            f"WHERE companies_fts MATCH :q {status_clause} "
+            f"ORDER BY {_SQLITE_BM25}, companies_fts.rowid "
+            "LIMIT :limit"
+        )
+    else:
+        # No native full-text support (or no index yet): fall back to substring matching on the company itself.
+        if dialect is not None:
+            logger.warning("Full-text search is not supported on '%s'; using LIKE matching.", dialect)
+        criteria = [or_(Company.name.ilike(f'%{t}%'), Company.description.ilike(f'%{t}%')) for t in terms]
+        if status:
+            criteria.append(Company.status == status)
+        return list(db.session.scalars(select(Company.id).where(*criteria).order_by(Company.id).limit(limit)))
+
+    return [row[0] for row in db.session.execute(stmt, params)]
@@ -0,0 +1,299 @@
+# backend/app/seeding.py
+"""
+Synthetic data for development and load testing, used by `flask seed` and the benchmarks.
+
+Every row is derived from (seed, row number) alone, so the same seed always produces the same
+data and a later run with higher targets only adds the missing rows (a top-up). Seeded users and
+companies use the SEED_EMAIL_DOMAIN, which is how existing seeded rows are counted.
+
+Regions, services and locations are few and inserted directly. Users and companies are generated
+in chunks on a process pool; the parent writes each chunk with executemany Core inserts, or with
+COPY on PostgreSQL (psycopg2), and commits it, so an interrupted run can simply be re-run. Ids are
+assigned up front so company/service links need no round trip; seed a database nobody else is
+writing to.
+"""
+import csv
+import io
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from faker import Faker
+from sqlalchemy import func, insert, select, text
+
+from . import geo, search
+from .caching import bump_version
+from .extensions import db
+from .models import Company, Location, Region, Service, User, company_service_association
+from .passwords import hash_password
+
+logger = logging.getLogger(__name__)
+# Faker logs every provider lookup at DEBUG, which floods development consoles
+logging.getLogger('faker').setLevel(logging.INFO)
+
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+SEED_PASSWORD = 'seed-password'
+
+SERVICE_NAMES = [
+    'Household Collection', 'Recycling', 'Organic Waste', 'Hazardous Waste', 'E-Waste',
+    'Construction Debris', 'Medical Waste', 'Bulk Pickup', 'Composting', 'Street Cleaning',
+    'Septic Services', 'Scrap Metal',
+]
+STATUS_WEIGHTS = (('approved', 70), ('pending', 20), ('rejected', 10))
+# Every OWNER_EVERY-th company gets a company_owner login
+OWNER_EVERY = 10
+# Companies are placed inside this latitude/longitude box (roughly Kenya)
+BOUNDS = ((-4.7, 4.6), (33.9, 41.9))
+EPOCH = datetime(2024, 1, 1)
+
+COMPANY_COLUMNS = ('id', 'name', 'email', 'phone', 'description', 'status', 'region_id', 'user_id',
+                   'latitude', 'longitude', 'service_radius_km', 'created_at')
+USER_COLUMNS = ('id', 'username', 'email', 'password_hash', 'role', 'company_id', 'region_id')
+LINK_COLUMNS = ('company_id', 'service_id')
+
+# Faker pools per (process, seed); building them costs ~0.1s, rows then cost microseconds
+_pools = {}
+
+
+def _row_rng(seed, kind, number):
+    return random.Random(f'{seed}:{kind}:{number}')
+
+
+def _faker(seed):
+    fake = Faker()
+    fake.seed_instance(seed)
+    return fake
+
+
+def _pool(seed):
+    if seed not in _pools:
+        fake = _faker(seed)
+        _pools[seed] = {
+            'stems': [fake.company() for _ in range(2000)],
+            'phrases': [fake.catch_phrase() for _ in range(2000)],
+            'phones': [fake.msisdn()[:12] for _ in range(500)],
+            'first_names': [fake.first_name().lower() for _ in range(500)],
+            'statuses': [status for status, weight in STATUS_WEIGHTS for _ in range(weight)],
+        }
+    return _pools[seed]
+
+
+def region_rows(count, seed):
+    """
+    The first `count` seeded regions: (name, description).
+    """
+    fake = _faker(seed)
+    names = []
+    while len(names) < count:
+        city = fake.city()
+        names.append(city if city not in names else f'{city} {len(names)}')
+    return [(name, f'Collection region around {name}') for name in names]
+
+
+def service_rows(count, seed):
+    fake = _faker(seed)
+    names = SERVICE_NAMES[:count] + [f'{fake.word().title()} Service {n}' for n in range(len(SERVICE_NAMES), count)]
+    return [(name, fake.sentence()) for name in names]
+
+
+def generate_chunk(task):
+    """
+    Builds one chunk of companies (with owners and service links) or users.
+    Runs in a worker process; returns {table: rows} with rows as tuples in *_COLUMNS order.
+    """
+    kind, seed, start, count, context = task
+    pool = _pool(seed)
+    if kind == 'users':
+        users = []
+        for offset, number in enumerate(range(start, start + count)):
+            rng = _row_rng(seed, 'user', number)
+            username = f'{rng.choice(pool["first_names"])}{number}'
+            users.append((context['first_id'] + offset, username, f'user{number}@{SEED_EMAIL_DOMAIN}',
+                          context['password_hash'], 'user', None, rng.choice(context['region_ids'])))
+        return {'users': users}
+
+    companies, links, owners = [], [], []
+    next_owner_id = context['first_owner_id']
+    for offset, number in enumerate(range(start, start + count)):
+        rng = _row_rng(seed, 'company', number)
+        company_id = context['first_id'] + offset
+        region_id = rng.choice(context['region_ids'])
+        companies.append((
+            company_id, f'{rng.choice(pool["stems"])} {number}', f'contact{number}@{SEED_EMAIL_DOMAIN}',
+            rng.choice(pool['phones']), rng.choice(pool['phrases']), rng.choice(pool['statuses']),
+            region_id, context['creator_id'],
+            round(rng.uniform(*BOUNDS[0]), 5), round(rng.uniform(*BOUNDS[1]), 5),
+            rng.choice((None, 5.0, 10.0, 25.0)), EPOCH + timedelta(seconds=number * 30),
+        ))
+        for service_id in rng.sample(context['service_ids'], min(rng.randint(1, 4), len(context['service_ids']))):
+            links.append((company_id, service_id))
+        if number % OWNER_EVERY == 0:
+            owners.append((next_owner_id, f'owner{number}', f'owner{number}@{SEED_EMAIL_DOMAIN}',
+                           context['password_hash'], 'company_owner', company_id, region_id))
+            next_owner_id += 1
+    return {'companies': companies, 'company_service_association': links, 'users': owners}
+
+
+def owners_before(number):
+    """
+    Owner logins created for companies numbered below `number`.
+    """
+    return (number + OWNER_EVERY - 1) // OWNER_EVERY
+
+
+class Seeder:
+    def __init__(self, seed=42, batch_size=10_000, workers=None, use_copy=True):
+        self.seed = seed
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        bind = db.session.get_bind()
+        self.use_copy = use_copy and bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg2'
+        self.report = {}
+
+    # Small reference tables
+
+    def seed_admin(self, password):
+        if db.session.scalar(select(User.id).where(User.username == 'admin')) is None:
+            admin = User(username='admin', email='admin@example.com', role='admin')
+            admin.set_password(password)
+            db.session.add(admin)
+            db.session.commit()
+            self.report['admin'] = 1
+        return db.session.scalar(select(User.id).where(User.username == 'admin'))
+
+    def _seed_named(self, model, rows, key):
+        existing = set(db.session.scalars(select(model.name)))
+        missing = [{'name': name, 'description': description} for name, description in rows if name not in existing]
+        if missing:
+            db.session.execute(insert(model), missing)
+            bump_version(key)
+            db.session.commit()
+        self.report[key] = len(missing)
+        names = [name for name, _ in rows]
+        return list(db.session.scalars(select(model.id).where(model.name.in_(names)).order_by(model.id)))
+
+    def seed_regions(self, count):
+        return self._seed_named(Region, region_rows(count, self.seed), 'regions')
+
+    def seed_services(self, count):
+        return self._seed_named(Service, service_rows(count, self.seed), 'services')
+
+    def seed_locations(self, region_ids, per_region):
+        existing = set(db.session.execute(select(Location.region_id, Location.name)).all())
+        regions = dict(db.session.execute(select(Region.id, Region.name).where(Region.id.in_(region_ids))).all())
+        rows = []
+        for region_id in region_ids:
+            for n in range(1, per_region + 1):
+                name = f'{regions[region_id]} Location {n}'[:100]
+                if (region_id, name) in existing:
+                    continue
+                rows.append({'name': name, 'region_id': region_id})
+        if rows:
+            db.session.execute(insert(Location), rows)
+            db.session.commit()
+        self.report['locations'] = len(rows)
+
+    # Bulk tables
+
+    def _count_seeded(self, column, prefix):
+        return db.session.scalar(select(func.count()).where(column.like(f'{prefix}%@{SEED_EMAIL_DOMAIN}')))
+
+    def _next_id(self, model):
+        return (db.session.scalar(select(func.max(model.id))) or 0) + 1
+
+    def _write(self, table, columns, rows):
+        if not rows:
+            return
+        if self.use_copy:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor = db.session.connection().connection.cursor()
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            target = db.metadata.tables[table]
+            db.session.execute(insert(target), [dict(zip(columns, row)) for row in rows])
+
+    def _run_chunks(self, kind, start, total, context_for):
+        """
+        Generates rows start..total-1 in chunks on the process pool and writes them in order.
+        """
+        tasks = []
+        for chunk_start in range(start, total, self.batch_size):
+            count = min(self.batch_size, total - chunk_start)
+            tasks.append((kind, self.seed, chunk_start, count, context_for(chunk_start)))
+        if not tasks:
+            return
+
+        def write(chunk):
+            for table, columns in (('companies', COMPANY_COLUMNS), ('users', USER_COLUMNS),
+                                   ('company_service_association', LINK_COLUMNS)):
+                self._write(table, columns, chunk.get(table))
+            db.session.commit()
+
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for chunk in executor.map(generate_chunk, tasks):
+                    write(chunk)
+        else:
+            for task in tasks:
+                write(generate_chunk(task))
+
+    def seed_users(self, total, password_hash, region_ids):
+        start = self._count_seeded(User.email, 'user')
+        first_id = self._next_id(User)
+        self._run_chunks('users', start, total, lambda chunk_start: {
+            'first_id': first_id + chunk_start - start, 'password_hash': password_hash, 'region_ids': region_ids,
+        })
+        self.report['users'] = max(total - start, 0)
+
+    def seed_companies(self, total, region_ids, service_ids, creator_id, password_hash):
+        start = self._count_seeded(Company.email, 'contact')
+        if start >= total:
+            self.report['companies'] = 0
+            return []
+        first_id = self._next_id(Company)
+        # Owner users are allocated after every existing user, one per OWNER_EVERY companies
+        first_owner_id = self._next_id(User)
+        context = {'region_ids': region_ids, 'service_ids': service_ids, 'creator_id': creator_id,
+                   'password_hash': password_hash}
+        self._run_chunks('companies', start, total, lambda chunk_start: dict(
+            context,
+            first_id=first_id + chunk_start - start,
+            first_owner_id=first_owner_id + owners_before(chunk_start) - owners_before(start),
+        ))
+        self.report['companies'] = total - start
+        return range(first_id, first_id + total - start)
+
+    def finish(self, new_company_ids):
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # Ids were assigned explicitly; move the sequences past them
+            for table in ('users', 'companies'):
+                db.session.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+                ))
+        if new_company_ids:
+            search.refresh_companies(list(new_company_ids))
+            bump_version('companies', geo.LOCATIONS_VERSION)
+        db.session.commit()
+
+
+def seed(companies=1000, users=1000, regions=47, services=12, locations_per_region=5,
+         seed=42, batch_size=10_000, workers=None, use_copy=True, admin_password='admin123'):
+    """
+    Tops the database up to the given numbers of seeded rows. Returns {table: rows added}.
+    """
+    seeder = Seeder(seed=seed, batch_size=batch_size, workers=workers, use_copy=use_copy)
+    admin_id = seeder.seed_admin(admin_password)
+    region_ids = seeder.seed_regions(regions)
+    service_ids = seeder.seed_services(services)
+    seeder.seed_locations(region_ids, locations_per_region)
+    # One hash shared by every seeded login: hashing millions of passwords would take days
+    password_hash = hash_password(SEED_PASSWORD)
+    seeder.seed_users(users, password_hash, region_ids)
+    new_company_ids = seeder.seed_companies(companies, region_ids, service_ids, admin_id, password_hash)
+    seeder.finish(new_company_ids)
+    logger.info("Seeding finished: %s", seeder.report)
+    return seeder.report
@@ -0,0 +1,124 @@
+# backend/app/serialization.py
+"""
+Response body encoding: a JSON provider backed by orjson, and MessagePack for clients that ask.
+
+FastJSONProvider is installed as app.json, so jsonify(), stream_json_array() and
+request.get_json() all go through it. orjson encodes datetimes, dates and UUIDs natively;
+datetimes come out in ISO 8601, the format serialize_company() has always used, so serializers
+can hand them over as they are. The JSON is the same as the default provider's (sorted keys,
+compact separators, indented in debug) except that non-ASCII text is sent as UTF-8 instead of
+\\u escapes. Without orjson the provider falls back to the json module with the same formats.
+
+jsonify() responses are negotiated: when MSGPACK_RESPONSES is on, the `msgpack` package is
+installed and the Accept header prefers application/msgpack (or application/x-msgpack) to JSON,
+the same object is packed as MessagePack. Such responses vary on Accept, and @conditional ETags
+differ per representation. Streamed list responses are always JSON.
+"""
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+
+from flask import current_app, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # falls back to the json module
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+# json.dumps() arguments orjson can reproduce (it always writes compact separators)
+_ORJSON_DUMPS_ARGS = {'indent', 'separators', 'sort_keys'}
+
+
+def encode_default(o):
+    """
+    Converts values JSON and MessagePack have no type for. Datetimes and dates become ISO 8601.
+    """
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def msgpack_mimetype():
+    """
+    The MessagePack mimetype the current request prefers to JSON, or None.
+    """
+    if msgpack is None or not current_app.config['MSGPACK_RESPONSES']:
+        return None
+    best = request.accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES)
+    return best if best in MSGPACK_MIMETYPES else None
+
+
+def packb(obj):
+    return msgpack.packb(obj, default=encode_default, use_bin_type=True)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    DefaultJSONProvider encoding with orjson, and negotiating MessagePack in response().
+    """
+
+    default = staticmethod(encode_default)
+
+    def _orjson_option(self, kwargs):
+        # None when orjson is missing or cannot honour the json.dumps() arguments
+        if orjson is None or not kwargs.keys() <= _ORJSON_DUMPS_ARGS or kwargs.get('indent') not in (None, 2):
+            return None
+        option = 0
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _orjson_dumps(self, obj, option):
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            # json.dumps() accepts non-string keys; orjson is slower when told to expect them
+            return orjson.dumps(obj, default=self.default, option=option | orjson.OPT_NON_STR_KEYS)
+
+    def dumps(self, obj, **kwargs):
+        option = self._orjson_option(kwargs)
+        if option is None:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj, option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        negotiated = msgpack is not None and has_request_context() and self._app.config['MSGPACK_RESPONSES']
+        mimetype = msgpack_mimetype() if negotiated else None
+        if mimetype:
+            response = self._app.response_class(packb(obj), mimetype=mimetype)
+        else:
+            pretty = (self.compact is None and self._app.debug) or self.compact is False
+            dump_args = {'indent': 2} if pretty else {'separators': (',', ':')}
+            option = self._orjson_option(dump_args)
+            if option is None:
+                body = f'{super().dumps(obj, **dump_args)}\n'
+            else:
+                body = self._orjson_dumps(obj, option | orjson.OPT_APPEND_NEWLINE)
+            response = self._app.response_class(body, mimetype=self.mimetype)
+        if negotiated:
+            response.vary.add('Accept')
+        return response
@@ -0,0 +1,144 @@
+# backend/app/sqlstats.py
+"""
+Per-request SQL instrumentation.
+
+Engine cursor events count the statements and database time of the current request. Every
+response gets a Server-Timing header (`db` with the query count, `app` with the total time).
+Statements slower than SQL_SLOW_QUERY_MS and requests issuing more than SQL_LOG_QUERY_COUNT
+statements are logged with normalized SQL and the endpoint name.
+
+Views can declare a query budget with @query_budget(n) (SQL_QUERY_BUDGET applies to the rest).
+Going over it logs a warning; under app.testing it raises QueryBudgetExceeded, so a test that
+exercises the endpoint fails.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+# Expanded IN lists / VALUES tuples: (?, ?, ?) or (%(id_1_1)s, %(id_1_2)s)
+_PARAM_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))+\s*\)')
+_MAX_LOGGED_SQL = 1000
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestSQLStats:
+    __slots__ = ('started', 'count', 'duration', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+
+
+def normalize_sql(statement):
+    """
+    Single-line SQL with expanded parameter lists collapsed, for grouping in logs.
+    """
+    normalized = _PARAM_LIST.sub('(...)', _WHITESPACE.sub(' ', statement).strip())
+    if len(normalized) > _MAX_LOGGED_SQL:
+        normalized = normalized[:_MAX_LOGGED_SQL] + '...'
+    return normalized
+
+
+def query_budget(max_queries):
+    """
+    Declares the most statements a view may issue per request.
+    """
+    def decorator(fn):
+        fn.query_budget = max_queries
+        return fn
+    return decorator
+
+
+def _current_stats():
+    if has_request_context():
+        return g.get('sql_stats')
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_stats() is not None:
+        context._sqlstats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    started = getattr(context, '_sqlstats_started', None)
+    if stats is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.count += 1
+    stats.duration += elapsed
+    stats.statements.append(statement)
+    slow_ms = current_app.config['SQL_SLOW_QUERY_MS']
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, request.endpoint, normalize_sql(statement))
+
+
+def _start_request():
+    g.sql_stats = RequestSQLStats()
+
+
+def _view_budget():
+    view = current_app.view_functions.get(request.endpoint)
+    # role_required and other decorators wrap the view; look through functools.wraps chains
+    while view is not None:
+        budget = getattr(view, 'query_budget', None)
+        if budget is not None:
+            return budget
+        view = getattr(view, '__wrapped__', None)
+    return current_app.config['SQL_QUERY_BUDGET'] or None
+
+
+def _finish_request(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+    )
+
+    log_count = current_app.config['SQL_LOG_QUERY_COUNT']
+    if log_count and stats.count > log_count:
+        top = Counter(normalize_sql(s) for s in stats.statements).most_common(3)
+        logger.warning(
+            "%s issued %d queries (%.1f ms in the database). Most repeated: %s",
+            request.endpoint, stats.count, stats.duration * 1000,
+            '; '.join(f'{n}x {sql}' for sql, n in top)
+        )
+
+    budget = _view_budget()
+    if budget is not None and stats.count > budget:
+        message = f"{request.endpoint} issued {stats.count} queries, over its budget of {budget}"
+        if current_app.testing:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return response
+
+
+def init_app(app):
+    """
+    Hooks the instrumentation into `app`'s request lifecycle and its engine.
+    """
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
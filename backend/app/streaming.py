@@ -0,0 +1,57 @@
+# backend/app/streaming.py
+"""
+Incremental JSON array responses for large list endpoints.
+
+The body is produced element by element from a generator, so memory does not grow with the
+number of rows, while the bytes stay identical to what jsonify() would return for the whole list.
+"""
+from flask import current_app, request, stream_with_context
+
+# Rows fetched per round trip when streaming (server-side cursor on PostgreSQL).
+STREAM_BATCH_SIZE = 1000
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def wants_stream():
+    """
+    True when the client asked for ?stream=1, or streaming is on by default (STREAM_LIST_RESPONSES).
+    """
+    value = request.args.get('stream')
+    if value is None:
+        return current_app.config.get('STREAM_LIST_RESPONSES', False)
+    return value.lower() in _TRUE_VALUES
+
+
+def _json_array_chunks(items, provider, pretty):
+    # Mirrors DefaultJSONProvider.response(): indent=2 in debug, compact separators otherwise.
+    if pretty:
+        first, separator, last = '[\n  ', ',\n  ', '\n]\n'
+        dump_args = {'indent': 2}
+    else:
+        first, separator, last = '[', ',', ']\n'
+        dump_args = {'separators': (',', ':')}
+
+    started = False
+    for item in items:
+        encoded = provider.dumps(item, **dump_args)
+        if pretty:
+            # Elements sit one level deep in the array, so every nested line gains two spaces.
+            encoded = encoded.replace('\n', '\n  ')
+        yield (separator if started else first) + encoded
+        started = True
+    yield last if started else '[]\n'
+
+
+def stream_json_array(items):
+    """
+    Returns a streamed Response with `items` (JSON-serializable values) encoded as a JSON array.
+    `items` is consumed lazily, inside the request context, while the body is being sent.
+    """
+    app = current_app._get_current_object()
+    provider = app.json
+    pretty = (provider.compact is None and app.debug) or provider.compact is False
+    return app.response_class(
+        stream_with_context(_json_array_chunks(items, provider, pretty)),
+        mimetype=provider.mimetype
+    )
@@ -0,0 +1,75 @@
+# backend/benchmarks/compare.py
+"""
+Compares two benchmarks.suite result files and flags regressions.
+
+A case regresses when its median is more than --threshold (relative) slower than in the
+baseline and the difference is above --min-ms, so sub-microsecond jitter is not reported.
+Back-to-back runs of the same commit on a shared machine differ by up to ~20%, hence the
+25% default; use a quiet machine and more --iterations for tighter thresholds.
+Exits with status 1 when any case regressed, so it can gate CI.
+
+    python -m benchmarks.compare results-base.json results-new.json --threshold 0.15
+"""
+import argparse
+import json
+import sys
+
+
+def compare(base, new, threshold, min_ms):
+    """
+    Returns (rows, regressions); each row is (name, base median, new median, relative change, flag).
+    """
+    rows = []
+    regressions = []
+    for name, new_result in new['results'].items():
+        base_result = base['results'].get(name)
+        if base_result is None:
+            rows.append((name, None, new_result['median_ms'], None, 'new'))
+            continue
+        before, after = base_result['median_ms'], new_result['median_ms']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > threshold and after - before > min_ms:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif change < -threshold and before - after > min_ms:
+            flag = 'faster'
+        rows.append((name, before, after, change, flag))
+    for name in base['results']:
+        if name not in new['results']:
+            rows.append((name, base['results'][name]['median_ms'], None, None, 'missing'))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative slowdown (0.25 = 25%%)')
+    parser.add_argument('--min-ms', type=float, default=0.005, help='Ignore absolute differences below this')
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    for key in ('scale', 'database', 'seed'):
+        if base['meta'].get(key) != new['meta'].get(key):
+            print(f"warning: {key} differs ({base['meta'].get(key)} vs {new['meta'].get(key)})", file=sys.stderr)
+
+    rows, regressions = compare(base, new, args.threshold, args.min_ms)
+    print(f"{'case':55} {base['meta'].get('commit') or 'base':>12} {new['meta'].get('commit') or 'new':>12} {'change':>8}")
+    for name, before, after, change, flag in rows:
+        before_text = f'{before:.4f}' if before is not None else '-'
+        after_text = f'{after:.4f}' if after is not None else '-'
+        change_text = f'{change:+.1%}' if change is not None else ''
+        print(f'{name:55} {before_text:>12} {after_text:>12} {change_text:>8} {flag}')
+
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) over {args.threshold:.0%}: {", ".join(regressions)}', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
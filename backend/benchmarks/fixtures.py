@@ -0,0 +1,29 @@
+# backend/benchmarks/fixtures.py
+"""
+Deterministic benchmark data, produced by the same generator as `flask seed` (app/seeding.py).
+
+The same scale and seed always produce the same rows, so results from two commits are comparable.
+"""
+from sqlalchemy import func, select
+
+from app import seeding
+from app.extensions import db
+from app.models import Company
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+ADMIN_USERNAME = 'admin'
+# Owner login of the first seeded company
+OWNER_USERNAME = 'owner0'
+PASSWORD = seeding.SEED_PASSWORD
+
+
+def seed_database(count, seed=42):
+    """
+    Tops the database up to `count` seeded companies. Returns False when nothing had to be added.
+    """
+    existing = db.session.scalar(select(func.count()).select_from(Company))
+    if existing > count:
+        raise RuntimeError(f'Database holds {existing} companies, more than the {count} requested')
+    report = seeding.seed(companies=count, users=count // 10, seed=seed)
+    return any(report.values())
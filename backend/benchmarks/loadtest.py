@@ -0,0 +1,242 @@
+# backend/benchmarks/loadtest.py
+"""
+Load test comparing gunicorn serving modes: throughput, latency percentiles and memory.
+
+For each --server spec (CLASS[:WORKERS[xTHREADS]], e.g. gthread:4x8 or gevent:2) this starts
+gunicorn with gunicorn.conf.py on a free port, waits for it to answer, then keeps --connections
+keep-alive clients busy on the --path URLs for --duration seconds. Memory is the summed PSS
+(proportional set size, so pages shared after fork are not counted twice) of the master and its
+workers, sampled during the run; "connections_per_gb" divides the connections served by the
+peak. The database must already be migrated and seeded (`flask seed`); use PostgreSQL, which is
+where cooperative workers make a difference. A database on the same machine answers in
+microseconds; --db-latency-ms routes the app through a local proxy that delays every reply from
+the database, like a managed database across the network would.
+
+    python -m benchmarks.loadtest --database-url postgresql://... --connections 200 \\
+        --server gthread:4x8 --server gevent:2 --output load.json
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse  # noqa: E402
+import http.client  # noqa: E402
+import json  # noqa: E402
+import os  # noqa: E402
+import platform  # noqa: E402
+import socket  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+
+import gevent  # noqa: E402
+from gevent.server import StreamServer  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+
+from benchmarks.suite import git_commit, summarize  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PATHS = ['/api/companies/?limit=20', '/api/companies/facets', '/api/regions/', '/api/services/']
+
+
+def parse_server(spec):
+    worker_class, _, size = spec.partition(':')
+    workers, _, threads = (size or '2').partition('x')
+    return worker_class, int(workers), int(threads or 1)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_tree(pid):
+    """
+    `pid` and all its descendants.
+    """
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    parent = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def pss_bytes(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Pss:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+def start_latency_proxy(database_url, latency_ms):
+    """
+    Listens on a free local port and forwards to the database, holding back each reply chunk for
+    `latency_ms`. Returns (proxy, database URL pointing at the proxy).
+    """
+    url = make_url(database_url)
+    upstream = (url.host or 'localhost', url.port or 5432)
+    delay = latency_ms / 1000
+
+    def pipe(source, target, wait):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                if wait:
+                    gevent.sleep(wait)
+                target.sendall(data)
+        except OSError:
+            pass
+        finally:
+            target.close()
+
+    def handle(client_socket, address):
+        server_socket = socket.create_connection(upstream)
+        gevent.spawn(pipe, client_socket, server_socket, 0)
+        pipe(server_socket, client_socket, delay)
+
+    proxy = StreamServer(('127.0.0.1', 0), handle)
+    proxy.start()
+    proxied = url.set(host='127.0.0.1', port=proxy.server_port)
+    return proxy, proxied.render_as_string(hide_password=False)
+
+
+def start_server(worker_class, workers, threads, port, database_url):
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+               GUNICORN_WORKER_CLASS=worker_class, DATABASE_URL=database_url, LOG_LEVEL='WARNING')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'wsgi:app'], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'gunicorn ({worker_class}) exited with status {server.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/api/regions/')
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f'gunicorn ({worker_class}) did not answer within 60s')
+
+
+def client(port, paths, offset, stop_at, latencies, errors):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    n = offset
+    while time.monotonic() < stop_at:
+        path = paths[n % len(paths)]
+        n += 1
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException):
+            errors.append('connection')
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    connection.close()
+
+
+def run_load(server_pid, port, paths, connections, duration, warmup):
+    # Untimed warm-up so lazily created state (connections, caches) is in place
+    warm_stop = time.monotonic() + warmup
+    gevent.joinall([gevent.spawn(client, port, paths, i, warm_stop, [], []) for i in range(connections)])
+
+    latencies, errors, peak_pss = [], [], 0
+    stop_at = time.monotonic() + duration
+    clients = [gevent.spawn(client, port, paths, i, stop_at, latencies, errors) for i in range(connections)]
+    while time.monotonic() < stop_at:
+        peak_pss = max(peak_pss, pss_bytes(process_tree(server_pid)))
+        gevent.sleep(0.5)
+    gevent.joinall(clients)
+
+    result = summarize(latencies) if latencies else {'iterations': 0}
+    result.update({
+        'requests_per_second': round(len(latencies) / duration, 1),
+        'errors': len(errors),
+        'peak_pss_mb': round(peak_pss / 2**20, 1),
+        'connections_per_gb': round(connections / (peak_pss / 2**30), 1) if peak_pss else None,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'), required='DATABASE_URL' not in os.environ)
+    parser.add_argument('--server', action='append', help='CLASS[:WORKERS[xTHREADS]] (repeatable; default gthread:2x4 and gevent:2)')
+    parser.add_argument('--connections', type=int, default=100, help='Concurrent keep-alive client connections')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--db-latency-ms', type=float, default=0, help='Delay added to every database reply')
+    parser.add_argument('--path', action='append', help=f'URL path to request (repeatable; default {DEFAULT_PATHS})')
+    parser.add_argument('--output', help='Write the JSON results here instead of stdout')
+    args = parser.parse_args()
+    paths = args.path or DEFAULT_PATHS
+    database_url = args.database_url
+    if args.db_latency_ms:
+        proxy, database_url = start_latency_proxy(database_url, args.db_latency_ms)
+
+    results = {}
+    for spec in args.server or ['gthread:2x4', 'gevent:2']:
+        worker_class, workers, threads = parse_server(spec)
+        port = free_port()
+        server = start_server(worker_class, workers, threads, port, database_url)
+        try:
+            results[spec] = result = run_load(server.pid, port, paths, args.connections, args.duration, args.warmup)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{spec:16} {result['requests_per_second']:>8} req/s  p50 {result.get('median_ms', 0):>8.1f} ms  "
+              f"p99 {result.get('p99_ms', 0):>8.1f} ms  errors {result['errors']:>5}  "
+              f"{result['peak_pss_mb']:>7} MB  {result['connections_per_gb']} conn/GB", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'connections': args.connections,
+            'duration_s': args.duration,
+            'db_latency_ms': args.db_latency_ms,
+            'paths': paths,
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# backend/benchmarks/login_storm.py
+"""
+Login storm benchmark.
+
+Serves the app from a WSGI server on a throwaway SQLite database, hammers /api/auth/token
+from many clients and, at the same time, measures the latency of a cheap unrelated endpoint
+(/api/regions/). Prints login throughput and the p50/p99 of the other endpoint, with the bounded
+hashing pool at the given settings.
+
+By default the server handles one request at a time, like the default gunicorn sync worker with
+one thread: reads then queue behind every login, whatever the pool settings. --threaded serves
+each request in its own thread, as gthread and gevent workers do, which is where the pool keeps
+reads fast.
+
+    python -m benchmarks.login_storm --login-clients 32 --duration 10
+    python -m benchmarks.login_storm --login-clients 32 --duration 10 --threaded --concurrency 2
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--login-clients', type=int, default=32)
+    parser.add_argument('--read-clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--concurrency', type=int, help='PASSWORD_HASH_CONCURRENCY')
+    parser.add_argument('--queue-size', type=int, help='PASSWORD_HASH_QUEUE_SIZE')
+    parser.add_argument('--queue-timeout', type=float, help='PASSWORD_HASH_QUEUE_TIMEOUT')
+    parser.add_argument('--threaded', action='store_true', help='serve requests concurrently (gthread/gevent)')
+    parser.add_argument('--port', type=int, default=5057)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_file.name}'
+
+    from werkzeug.serving import make_server
+    from app import create_app, search
+    from app.extensions import db
+    from app.models import Region, User
+
+    app = create_app()
+    for key, value in (('PASSWORD_HASH_CONCURRENCY', args.concurrency),
+                       ('PASSWORD_HASH_QUEUE_SIZE', args.queue_size),
+                       ('PASSWORD_HASH_QUEUE_TIMEOUT', args.queue_timeout)):
+        if value is not None:
+            app.config[key] = value
+
+    with app.app_context():
+        db.create_all()
+        search.create_index()
+        user = User(username='storm', email='storm@example.com', role='user')
+        user.set_password('storm-password')
+        db.session.add_all([user, Region(name='Nairobi')])
+        db.session.commit()
+
+    server = make_server('127.0.0.1', args.port, app, threaded=args.threaded)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{args.port}'
+
+    deadline = time.monotonic() + args.duration
+    results = {'login_ok': 0, 'login_503': 0, 'login_other': 0, 'read_latencies': []}
+    lock = threading.Lock()
+
+    def login_client():
+        body = json.dumps({'username': 'storm', 'password': 'storm-password'}).encode()
+        while time.monotonic() < deadline:
+            req = urllib.request.Request(f'{base}/api/auth/token', data=body,
+                                         headers={'Content-Type': 'application/json'})
+            try:
+                urllib.request.urlopen(req).read()
+                key = 'login_ok'
+            except urllib.error.HTTPError as e:
+                key = 'login_503' if e.code == 503 else 'login_other'
+            with lock:
+                results[key] += 1
+
+    def read_client():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            urllib.request.urlopen(f'{base}/api/regions/').read()
+            with lock:
+                results['read_latencies'].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=login_client) for _ in range(args.login_clients)]
+    threads += [threading.Thread(target=read_client) for _ in range(args.read_clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    server.shutdown()
+    os.unlink(db_file.name)
+
+    latencies = results['read_latencies']
+    print(json.dumps({
+        'server': 'threaded' if args.threaded else 'sync',
+        'hash_concurrency': app.config['PASSWORD_HASH_CONCURRENCY'],
+        'hash_queue_size': app.config['PASSWORD_HASH_QUEUE_SIZE'],
+        'logins_per_second': round(results['login_ok'] / args.duration, 1),
+        'login_503': results['login_503'],
+        'login_errors': results['login_other'],
+        'regions_requests': len(latencies),
+        'regions_p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+        'regions_p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+# backend/benchmarks/suite.py
+"""
+Microbenchmark suite: serializers, response encoders (time and payload size), read endpoints, the
+role_required decorator, notification fan-out, password hashing and cold start (create_app and the pre-fork warm-up, each timed in fresh interpreters).
+
+Seeds deterministic data (see benchmarks.fixtures) into a throwaway SQLite file, or into the
+database given with --database-url (which must already be migrated with `flask db upgrade`;
+a database seeded earlier with the same scale and seed is reused as is). Endpoints are called
+through the Flask test client, so the numbers cover routing, queries and serialization but
+not the network. Request logging is turned down to WARNING to keep console I/O out of the timings.
+
+    python -m benchmarks.suite --scale 1k --output results-base.json
+    python -m benchmarks.compare results-base.json results-new.json
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Full-list endpoints return every company; above this many they are skipped
+MAX_FULL_LIST_COMPANIES = 100_000
+
+# Run in a fresh interpreter: cold import + create_app(), then warm_up(), in seconds
+STARTUP_PROBE = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+created = time.perf_counter()
+from app.warmup import warm_up
+warm_up(app)
+print(json.dumps({'create_app': created - started, 'warm_up': time.perf_counter() - created}))
+"""
+STARTUP_CASES = ('startup: create_app', 'startup: warm_up')
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+    return f'{commit}-dirty' if commit and dirty else commit or None
+
+
+def measure(fn, iterations, warmup=3, per_call=1):
+    """
+    Times `fn` `iterations` times after `warmup` untimed calls. `per_call` divides each sample
+    when `fn` performs several operations (e.g. serializes a batch).
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000 / per_call)
+    return summarize(samples)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'iterations': len(samples),
+        'median_ms': round(statistics.median(samples), 4),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'min_ms': round(samples[0], 4),
+    }
+
+
+def measure_startup(iterations):
+    """
+    Cold start timings, one fresh interpreter per iteration (the first run is discarded).
+    """
+    samples = {'create_app': [], 'warm_up': []}
+    for iteration in range(iterations + 1):
+        output = subprocess.run([sys.executable, '-c', STARTUP_PROBE], capture_output=True, text=True, check=True).stdout
+        if iteration:
+            for step, seconds in json.loads(output.splitlines()[-1]).items():
+                samples[step].append(seconds * 1000)
+    return {f'startup: {step}': summarize(step_samples) for step, step_samples in samples.items()}
+
+
+def register_decorator_probes(app):
+    """
+    Three identical trivial views: undecorated, @jwt_required() and @role_required(['admin']).
+    Must run before the app serves its first request.
+    """
+    from flask import Blueprint, jsonify
+    from flask_jwt_extended import jwt_required
+    from app.authz import role_required
+
+    probes = Blueprint('bench_probes', __name__, url_prefix='/bench')
+
+    @probes.route('/plain')
+    def plain():
+        return jsonify({'ok': True})
+
+    @probes.route('/jwt')
+    @jwt_required()
+    def jwt_only():
+        return jsonify({'ok': True})
+
+    @probes.route('/role')
+    @role_required(['admin'])
+    def role(current_user):
+        return jsonify({'ok': True})
+
+    app.register_blueprint(probes)
+
+
+def run_suite(app, scale_count, iterations, only=None):
+    from flask.json.provider import DefaultJSONProvider
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import select
+
+    from app.authz import create_user_token
+    from app.extensions import db
+    from app import notifications
+    from app.models import Company, Region, Service, User
+    from app.passwords import hash_password, verify_password
+    from app.routes.companies import company_read_query, serialize_companies, serialize_company
+    from app.routes.regions import serialize_region
+    from app.routes.services import serialize_service
+    from app.serialization import encode_default, msgpack
+    from benchmarks.fixtures import ADMIN_USERNAME, OWNER_USERNAME, PASSWORD
+
+    client = app.test_client()
+    results = {}
+
+    def case(name, fn, n=iterations, **kwargs):
+        if only and not any(pattern in name for pattern in only):
+            return
+        results[name] = measure(fn, n, **kwargs)
+        print(f"{name:55} {results[name]['median_ms']:>10.4f} ms", file=sys.stderr)
+
+    with app.app_context():
+        admin = db.session.scalar(select(User).where(User.username == ADMIN_USERNAME))
+        owner = db.session.scalar(select(User).where(User.username == OWNER_USERNAME))
+        admin_headers = {'Authorization': f'Bearer {create_user_token(admin)}'}
+        owner_headers = {'Authorization': f'Bearer {create_user_token(owner)}'}
+        legacy_headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+        company_id = owner.company_id
+        region_id = db.session.scalar(select(Region.id).order_by(Region.id))
+        service_id = db.session.scalar(select(Service.id).order_by(Service.id))
+        sample_company = db.session.get(Company, company_id)
+        lat, lon = sample_company.latitude, sample_company.longitude
+        search_term = sample_company.name.split()[0]
+
+        # Serializers, on objects already loaded (no queries inside the timed loop)
+        batch = company_read_query().order_by(Company.id).limit(100).all()
+        services_by_id = {c['id']: c['services'] for c in serialize_companies(batch)}
+        case('serialize_company', lambda: [serialize_company(c, services_by_id[c.id]) for c in batch],
+             per_call=len(batch))
+        regions = Region.query.all()
+        case('serialize_region', lambda: [serialize_region(r) for r in regions], per_call=len(regions))
+        services = Service.query.all()
+        case('serialize_service', lambda: [serialize_service(s) for s in services], per_call=len(services))
+
+        # Response encoders on the first page of 1000 companies: time per company, and body size
+        # as sent and gzipped. The json module case is Flask's default provider.
+        page = serialize_companies(company_read_query().order_by(Company.id).limit(1000).all())
+        stdlib_json = DefaultJSONProvider(app)
+        stdlib_json.default = encode_default
+        encoders = [('encode companies: json module', stdlib_json, None),
+                    ('encode companies: app.json', app.json, None)]
+        if msgpack is not None:
+            encoders.append(('encode companies: msgpack', app.json, {'Accept': 'application/msgpack'}))
+        for name, provider, headers in encoders:
+            with app.test_request_context(headers=headers):
+                encode = lambda: provider.response(page).get_data()  # noqa: E731
+                case(name, encode, per_call=len(page))
+                if name in results:
+                    body = encode()
+                    results[name].update(bytes=len(body), gzip_bytes=len(gzip.compress(body, 6)))
+                    print(f"{'':55} {len(body):>10} bytes, {results[name]['gzip_bytes']} gzipped", file=sys.stderr)
+        db.session.remove()
+
+        def get(url, headers=None):
+            def call():
+                response = client.get(url, headers=headers)
+                if response.status_code != 200:
+                    raise RuntimeError(f'GET {url} returned {response.status_code}')
+                response.get_data()
+            return call
+
+        endpoints = [
+            ('GET /api/companies/?limit=50', '/api/companies/?limit=50', None),
+            ('GET /api/companies/?limit=50 (gzip)', '/api/companies/?limit=50', {'Accept-Encoding': 'gzip'}),
+            ('GET /api/companies/?limit=50 (msgpack)', '/api/companies/?limit=50', {'Accept': 'application/msgpack'}),
+            ('GET /api/companies/?limit=50&status=approved', '/api/companies/?limit=50&status=approved', None),
+            ('GET /api/companies/?limit=50&fields=id,name', '/api/companies/?limit=50&fields=id,name', None),
+            ('GET /api/companies/<id>', f'/api/companies/{company_id}', None),
+            ('GET /api/companies/my-company', '/api/companies/my-company', owner_headers),
+            ('GET /api/companies/search', f'/api/companies/search?q={search_term}', None),
+            ('GET /api/companies/facets', '/api/companies/facets', None),
+            ('GET /api/companies/nearby', f'/api/companies/nearby?lat={lat}&lon={lon}&radius=25', None),
+            ('GET /api/regions/<id>/services/<id>/companies',
+             f'/api/regions/{region_id}/services/{service_id}/companies', None),
+            ('GET /api/regions/', '/api/regions/', None),
+            ('GET /api/regions/<id>', f'/api/regions/{region_id}', None),
+            ('GET /api/services/', '/api/services/', None),
+            ('GET /api/services/<id>', f'/api/services/{service_id}', None),
+            ('GET /api/users/', '/api/users/', admin_headers),
+            ('GET /api/users/me', '/api/users/me', admin_headers),
+        ]
+        for name, url, headers in endpoints:
+            case(name, get(url, headers))
+        if scale_count <= MAX_FULL_LIST_COMPANIES:
+            case('GET /api/companies/ (full list)', get('/api/companies/'), n=max(3, iterations // 20), warmup=1)
+            case('GET /api/companies/ (full list, gzip)', get('/api/companies/', {'Accept-Encoding': 'gzip'}),
+                 n=max(3, iterations // 20), warmup=1)
+            case('GET /api/companies/ (full list, msgpack)', get('/api/companies/', {'Accept': 'application/msgpack'}),
+                 n=max(3, iterations // 20), warmup=1)
+
+        # Decorator overhead: same trivial view with and without authorization
+        case('decorator: none', get('/bench/plain'))
+        case('decorator: jwt_required', get('/bench/jwt', admin_headers))
+        case('decorator: role_required (claims in token)', get('/bench/role', admin_headers))
+        case('decorator: role_required (token without claims)', get('/bench/role', legacy_headers))
+
+        # Notifying every resident of a region, rolled back after each call
+        def fan_out_region():
+            notifications.fan_out('company_listed', 'Benchmark company is now listed.', User.region_id == region_id)
+            db.session.rollback()
+        case('notifications: region fan-out', fan_out_region, n=max(3, iterations // 10), warmup=1)
+
+        password_hash = hash_password(PASSWORD)
+        case('password: hash', lambda: hash_password(PASSWORD), n=max(5, iterations // 10), warmup=1)
+        case('password: verify', lambda: verify_password(password_hash, PASSWORD), n=max(5, iterations // 10), warmup=1)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=['1k', '100k', '1m'], default='1k')
+    parser.add_argument('--database-url', help='Migrated database to seed/reuse (default: a temporary SQLite file)')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', action='append', help='Run only cases whose name contains this (repeatable)')
+    parser.add_argument('--output', help='Write the JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    db_file = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        os.environ['DATABASE_URL'] = f'sqlite:///{db_file.name}'
+
+    import sqlalchemy
+    from app import create_app, search
+    from app.extensions import db
+    from benchmarks.fixtures import SCALES, seed_database
+
+    # Keep stdout clean for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        app = create_app()
+    logging.getLogger().setLevel(logging.WARNING)
+    register_decorator_probes(app)
+    count = SCALES[args.scale]
+
+    with app.app_context():
+        if db_file:
+            db.create_all()
+            search.create_index()
+            db.session.commit()
+        started = time.perf_counter()
+        seeded = seed_database(count, seed=args.seed)
+        seed_seconds = round(time.perf_counter() - started, 1)
+        dialect = db.engine.dialect.name
+        print(f"{'Seeded' if seeded else 'Reused'} {count} companies ({seed_seconds}s)", file=sys.stderr)
+
+    results = run_suite(app, count, args.iterations, only=args.only)
+    if not args.only or any(pattern in name for name in STARTUP_CASES for pattern in args.only):
+        results.update(measure_startup(max(3, args.iterations // 10)))
+        for name in STARTUP_CASES:
+            print(f"{name:55} {results[name]['median_ms']:>10.4f} ms", file=sys.stderr)
+    if db_file:
+        os.unlink(db_file.name)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'scale': args.scale,
+            'companies': count,
+            'seed': args.seed,
+            'database': dialect,
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,30 @@ import os
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def _engine_options(uri):
+    """
+    SQLAlchemy engine/pool settings from the environment (DB_* variables).
+    Pool sizing only applies to server databases; SQLite keeps Flask-SQLAlchemy's defaults.
+    """
+    if uri.startswith('sqlite'):
+        return {}
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        # Seconds to wait for a free connection before failing the request with a 503
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        # Replace connections older than this many seconds (-1 disables)
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        # Test connections on checkout, so a database restart does not fail the first requests
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    }
+    statement_timeout_ms = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    if statement_timeout_ms > 0 and uri.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout_ms}'}
+    return options
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'supersecretkey')
 
@@ -14,12 +38,93 @@ class Config:
         raw_uri = raw_uri.replace("postgres://", "postgresql://", 1)
 
     SQLALCHEMY_DATABASE_URI = raw_uri
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(raw_uri)
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # SQL instrumentation: log statements slower than SQL_SLOW_QUERY_MS and requests with more
+    # than SQL_LOG_QUERY_COUNT statements (0 disables either). SQL_QUERY_BUDGET is the default
+    # per-request limit for views without @query_budget (0 = none).
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 200))
+    SQL_LOG_QUERY_COUNT = int(os.environ.get('SQL_LOG_QUERY_COUNT', 20))
+    SQL_QUERY_BUDGET = int(os.environ.get('SQL_QUERY_BUDGET', 0))
+
+    # Logging goes through a queue to a background writer. LOG_LEVEL defaults to DEBUG under
+    # FLASK_DEBUG and INFO otherwise; LOG_FORMAT is 'json' (one object per line) or 'text'.
+    # Records beyond LOG_QUEUE_SIZE waiting to be written are dropped. Only this fraction of
+    # the per-request "Role Check" records is logged.
+    LOG_LEVEL = os.environ.get('LOG_LEVEL')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    LOG_ROLE_CHECK_SAMPLE_RATE = float(os.environ.get('LOG_ROLE_CHECK_SAMPLE_RATE', 0.01))
+
+    # Prometheus metrics at GET /metrics; scrapers must send METRICS_TOKEN as a Bearer token, and
+    # without one the endpoint answers 404. METRICS_PUBLIC=true serves it to anyone instead (only
+    # for apps reachable from a private network alone).
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'false').lower() == 'true'
+
+    # Requests made by the pre-fork warm-up (app/warmup.py) to fill the statement and version caches
+    WARMUP_PATHS = [path for path in os.environ.get(
+        'WARMUP_PATHS', '/api/companies/?limit=1,/api/companies/0,/api/companies/facets,/api/regions/,/api/services/'
+    ).split(',') if path]
+    # The warm-up retries SELECT 1 (a second apart) this many times before giving up
+    WARMUP_DB_ATTEMPTS = int(os.environ.get('WARMUP_DB_ATTEMPTS', 3))
+
+    # role_required trusts the role/company claims of a token until the user's claims version
+    # changes (app/authz.py). Each worker re-reads a user's version at most this often, so a
+    # change made through another worker takes up to this many seconds to apply there.
+    AUTH_CLAIMS_CHECK_SECONDS = float(os.environ.get('AUTH_CLAIMS_CHECK_SECONDS', 30))
+
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
     JWT_TOKEN_LOCATION = ['headers', 'cookies']
     JWT_COOKIE_SECURE = False  # Set to True in production with HTTPS
     JWT_COOKIE_SAMESITE = 'Lax'
     JWT_ACCESS_COOKIE_PATH = '/'
     JWT_COOKIE_CSRF_PROTECT = False  # Optional depending on implementation
+
+    # Companies directory pagination. While the compatibility flag is on, GET /api/companies/
+    # without `limit`/`cursor` keeps returning the full, unpaginated array.
+    COMPANIES_UNPAGINATED_COMPAT = os.environ.get('COMPANIES_UNPAGINATED_COMPAT', 'true').lower() == 'true'
+    COMPANIES_PAGE_SIZE = int(os.environ.get('COMPANIES_PAGE_SIZE', 50))
+    COMPANIES_MAX_PAGE_SIZE = int(os.environ.get('COMPANIES_MAX_PAGE_SIZE', 200))
+
+    # Page size of GET /api/notifications/ (?limit= up to the maximum)
+    NOTIFICATIONS_PAGE_SIZE = int(os.environ.get('NOTIFICATIONS_PAGE_SIZE', 20))
+    NOTIFICATIONS_MAX_PAGE_SIZE = int(os.environ.get('NOTIFICATIONS_MAX_PAGE_SIZE', 100))
+
+    # Stream the full lists (companies, services, users) row by row instead of building them
+    # in memory. Clients can also opt in per request with ?stream=1.
+    STREAM_LIST_RESPONSES = os.environ.get('STREAM_LIST_RESPONSES', 'false').lower() == 'true'
+
+    # Regions and services are served with ETags; clients revalidate after this many seconds.
+    REFERENCE_DATA_MAX_AGE = int(os.environ.get('REFERENCE_DATA_MAX_AGE', 0))
+
+    # Response compression (gzip; brotli too when the `brotli` package is installed) for bodies of
+    # at least COMPRESSION_MIN_SIZE bytes with one of these mimetypes. Compressed bodies of responses
+    # with an ETag are cached per worker, up to COMPRESSION_CACHE_MAX_BYTES in total.
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_MIMETYPES = ['application/json', 'text/plain', 'text/html', 'text/css', 'text/csv',
+                             'application/javascript', 'application/x-ndjson',
+                             'application/msgpack', 'application/x-msgpack']
+    COMPRESSION_LEVELS = {
+        'gzip': int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+        'br': int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4)),
+    }
+    COMPRESSION_CACHE_MAX_BYTES = int(os.environ.get('COMPRESSION_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+    # JSON responses are also available as MessagePack to clients sending Accept: application/msgpack
+    # (needs the `msgpack` package; see app/serialization.py).
+    MSGPACK_RESPONSES = os.environ.get('MSGPACK_RESPONSES', 'true').lower() == 'true'
+
+    # Password hashing. Hashes made with another method are upgraded on the next login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+    PASSWORD_HASH_SALT_LENGTH = int(os.environ.get('PASSWORD_HASH_SALT_LENGTH', 16))
+    # At most CONCURRENCY hashes run at once per worker and QUEUE_SIZE more may wait, for up to
+    # QUEUE_TIMEOUT seconds; beyond that requests get a 503. This keeps other requests moving only
+    # in gthread or gevent workers: a sync worker is busy until its own hash is done regardless.
+    PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', os.cpu_count() or 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 16))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 2.0))
@@ -0,0 +1,78 @@
+# backend/gunicorn.conf.py
+"""
+Gunicorn settings (loaded automatically when gunicorn is started from backend/).
+
+Workers share Prometheus metrics through a multiprocess directory: it must be set before the app
+(and prometheus_client) is imported, and is emptied when the master starts.
+
+The app is preloaded and warmed up (app/warmup.py) in the master before the workers are forked,
+so they start with configured mappers and primed caches. With GUNICORN_PRELOAD=false each worker
+imports the app and warms itself up before accepting requests.
+
+GUNICORN_WORKER_CLASS=gevent serves each request in a greenlet: a worker holds up to
+GUNICORN_WORKER_CONNECTIONS connections and switches between them while they wait on Postgres
+(see app/cooperative.py). Size DB_POOL_SIZE/DB_MAX_OVERFLOW for the concurrent queries you want
+per worker; other greenlets wait for a pooled connection.
+
+Sync workers serve one request at a time. GUNICORN_THREADS above 1 makes gunicorn run them as
+gthread workers instead, with that many requests in flight per worker; keep DB_POOL_SIZE at
+least that large.
+"""
+import gc
+import os
+import shutil
+import tempfile
+
+# prometheus_client picks its storage when first imported, so this comes before any import of it
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'prometheus-multiproc'))
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+if worker_class == 'gevent':
+    # Patch before anything else is imported (including the preloaded app), so every lock,
+    # queue and socket created afterwards is cooperative
+    from gevent import monkey
+    monkey.patch_all()
+
+    from app.cooperative import patch_psycopg2
+    patch_psycopg2()
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+from prometheus_client import multiprocess  # noqa: E402
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# More than one thread turns sync workers into gthread workers, so it has to be asked for
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def _reset_metrics_dir():
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def on_starting(server):
+    # Files left by a previous master would be added to this run's counters
+    _reset_metrics_dir()
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before any worker is forked
+    if server.cfg.preload_app:
+        from app.warmup import warm_up
+        warm_up(server.app.wsgi())
+        # Drop what the master itself recorded while warming up
+        _reset_metrics_dir()
+        # Keep the collector from touching (and so copying) the objects the workers inherit
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        from app.warmup import warm_up
+        warm_up(worker.wsgi, dispose=False)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
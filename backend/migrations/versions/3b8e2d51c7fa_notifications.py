@@ -0,0 +1,55 @@
+"""Notifications, region and unread count on users
+
+Revision ID: 3b8e2d51c7fa
+Revises: 4e1f0c7b2d96
+Create Date: 2026-10-18 16:20:37.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e2d51c7fa'
+down_revision = '4e1f0c7b2d96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notifications',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('message', sa.String(length=500), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notifications_user_id_id', 'notifications', ['user_id', 'id'], unique=False)
+    op.create_index('ix_notifications_user_id_unread', 'notifications', ['user_id', 'id'], unique=False,
+                    postgresql_where=sa.text('read_at IS NULL'), sqlite_where=sa.text('read_at IS NULL'))
+
+    # Plain ALTER TABLE (no batch mode), as in a5cc9a643273: recreating users on SQLite would
+    # lose its expression indexes. The server default fills existing rows without a rewrite.
+    op.add_column('users', sa.Column('region_id', sa.Integer(), nullable=True))
+    op.add_column('users', sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_users_region_id'), 'users', ['region_id'], unique=False)
+    # SQLite cannot add a constraint to an existing table
+    if op.get_bind().dialect.name != 'sqlite':
+        op.create_foreign_key('users_region_id_fkey', 'users', 'regions', ['region_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_constraint('users_region_id_fkey', 'users', type_='foreignkey')
+    op.drop_index(op.f('ix_users_region_id'), table_name='users')
+    op.drop_column('users', 'unread_count')
+    op.drop_column('users', 'region_id')
+
+    op.drop_index('ix_notifications_user_id_unread', table_name='notifications')
+    op.drop_index('ix_notifications_user_id_id', table_name='notifications')
+    op.drop_table('notifications')
@@ -0,0 +1,24 @@
+"""Region x status index for region/service coverage lookups
+
+Revision ID: 4e1f0c7b2d96
+Revises: a5cc9a643273
+Create Date: 2026-10-18 12:40:13.802117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e1f0c7b2d96'
+down_revision = 'a5cc9a643273'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_companies_region_id_status_id', 'companies', ['region_id', 'status', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_companies_region_id_status_id', table_name='companies')
@@ -0,0 +1,67 @@
+"""Full-text search index for companies
+
+Revision ID: 57dd894f39e9
+Revises: 935ba9013ad2
+Create Date: 2026-10-18 10:03:15.640381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '57dd894f39e9'
+down_revision = '935ba9013ad2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The search documents are maintained by app/search.py, not by the ORM models.
+    # Existing companies are indexed here with the same document definition.
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("ALTER TABLE companies ADD COLUMN search_vector tsvector")
+        op.execute("""
+            UPDATE companies SET search_vector =
+                setweight(to_tsvector('simple', coalesce(companies.name, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce((
+                    SELECT regions.name FROM regions WHERE regions.id = companies.region_id
+                ), '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce((
+                    SELECT string_agg(services.name, ' ')
+                    FROM services
+                    JOIN company_service_association csa ON csa.service_id = services.id
+                    WHERE csa.company_id = companies.id
+                ), '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(companies.description, '')), 'C')
+        """)
+        op.execute("CREATE INDEX ix_companies_search_vector ON companies USING gin (search_vector)")
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts "
+            "USING fts5(name, region, services, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute("""
+            INSERT INTO companies_fts (rowid, name, region, services, description)
+            SELECT companies.id,
+                   companies.name,
+                   coalesce((SELECT regions.name FROM regions WHERE regions.id = companies.region_id), ''),
+                   coalesce((
+                       SELECT group_concat(services.name, ' ')
+                       FROM services
+                       JOIN company_service_association csa ON csa.service_id = services.id
+                       WHERE csa.company_id = companies.id
+                   ), ''),
+                   coalesce(companies.description, '')
+            FROM companies
+        """)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_companies_search_vector")
+        op.execute("ALTER TABLE companies DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS companies_fts")
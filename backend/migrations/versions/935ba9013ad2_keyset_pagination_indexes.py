@@ -0,0 +1,38 @@
+"""Keyset pagination indexes for the companies directory
+
+Revision ID: 935ba9013ad2
+Revises: 79d2b3229987
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '935ba9013ad2'
+down_revision = '79d2b3229987'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination orders on (created_at, id), so created_at can no longer be NULL.
+    op.execute("UPDATE companies SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+    op.create_index('ix_companies_created_at_id', 'companies', ['created_at', 'id'], unique=False)
+    op.create_index('ix_companies_status_created_at_id', 'companies', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_companies_region_id_created_at_id', 'companies', ['region_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_company_service_service_id_company_id', 'company_service_association', ['service_id', 'company_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_company_service_service_id_company_id', table_name='company_service_association')
+    op.drop_index('ix_companies_region_id_created_at_id', table_name='companies')
+    op.drop_index('ix_companies_status_created_at_id', table_name='companies')
+    op.drop_index('ix_companies_created_at_id', table_name='companies')
+
+    with op.batch_alter_table('companies', schema=None) as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
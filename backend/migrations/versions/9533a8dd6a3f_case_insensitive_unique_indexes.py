@@ -0,0 +1,29 @@
+"""Case-insensitive unique indexes on usernames and emails
+
+Revision ID: 9533a8dd6a3f
+Revises: d0da8fbea140
+Create Date: 2026-10-18 11:20:07.334512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9533a8dd6a3f'
+down_revision = 'd0da8fbea140'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fails if existing rows differ only by case; resolve those duplicates before upgrading.
+    op.create_index('uq_users_username_lower', 'users', [sa.text('lower(username)')], unique=True)
+    op.create_index('uq_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+    op.create_index('uq_companies_email_lower', 'companies', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_companies_email_lower', table_name='companies')
+    op.drop_index('uq_users_email_lower', table_name='users')
+    op.drop_index('uq_users_username_lower', table_name='users')
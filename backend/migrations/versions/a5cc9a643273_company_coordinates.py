@@ -0,0 +1,49 @@
+"""Coordinates and service radius on companies
+
+Revision ID: a5cc9a643273
+Revises: 9533a8dd6a3f
+Create Date: 2026-10-18 12:02:41.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5cc9a643273'
+down_revision = '9533a8dd6a3f'
+branch_labels = None
+depends_on = None
+
+# Must stay in sync with _PG_POINT in app/geo.py so the planner picks the index.
+GEOGRAPHY_EXPRESSION = 'geography(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326))'
+
+
+def _postgis_available(bind):
+    if bind.dialect.name != 'postgresql':
+        return False
+    return bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'postgis'")).first() is not None
+
+
+def upgrade():
+    # Plain ALTER TABLE (no batch mode): recreating the table on SQLite would lose the
+    # expression indexes that reflection cannot see.
+    op.add_column('companies', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('companies', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('companies', sa.Column('service_radius_km', sa.Float(), nullable=True))
+
+    bind = op.get_bind()
+    if _postgis_available(bind):
+        op.execute('CREATE EXTENSION IF NOT EXISTS postgis')
+        op.execute(
+            f'CREATE INDEX ix_companies_geography ON companies USING gist ({GEOGRAPHY_EXPRESSION}) '
+            'WHERE latitude IS NOT NULL AND longitude IS NOT NULL'
+        )
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_companies_geography')
+
+    op.drop_column('companies', 'service_radius_km')
+    op.drop_column('companies', 'longitude')
+    op.drop_column('companies', 'latitude')
@@ -0,0 +1,28 @@
+"""Per-table version counters for ETags
+
+Revision ID: d0da8fbea140
+Revises: 57dd894f39e9
+Create Date: 2026-10-18 10:41:52.907113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd0da8fbea140'
+down_revision = '57dd894f39e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('table_versions',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,86 @@
+# backend/tests/conftest.py
+"""
+Fixtures: an app on a fresh in-memory SQLite database per test, its test client, and helpers to
+add companies and read the per-request statement count reported by app.sqlstats.
+"""
+import os
+import re
+import sys
+
+import pytest
+
+# Never let the suite touch the database configured in the environment
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, search  # noqa: E402
+from app.authz import user_cache  # noqa: E402
+from app.compression import compressed_cache  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.facets import facet_cache  # noqa: E402
+from app.models import Company, Region, Service, User  # noqa: E402
+
+_QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    # Per-process caches are keyed by table versions, which restart at 0 with every database
+    for cache in (user_cache, compressed_cache, facet_cache):
+        cache.clear()
+    with app.app_context():
+        db.create_all()
+        search.create_index()
+        db.session.commit()
+        yield app
+        db.session.remove()
+        # Each app has its own engine, so this drops the in-memory database
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(app):
+    user = User(username='admin', email='admin@example.com', role='admin')
+    user.set_password('admin-password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def add_companies(app, admin):
+    """
+    add_companies(n) adds n companies spread over three regions, each with one to five services.
+    """
+    regions = [Region(name=f'Region {i}') for i in range(3)]
+    services = [Service(name=f'Service {i}', description=f'Service {i}') for i in range(5)]
+    db.session.add_all(regions + services)
+    db.session.commit()
+    added = []
+
+    def add(n):
+        start = len(added)
+        for number in range(start, start + n):
+            company = Company(name=f'Company {number}', email=f'company{number}@example.com', phone='0700000000',
+                              status='approved', region=regions[number % 3], user=admin)
+            company.services = services[:number % 5 + 1]
+            added.append(company)
+            db.session.add(company)
+        db.session.commit()
+        return added[start:]
+    return add
+
+
+def query_count(response):
+    """
+    Statements the request issued, from the Server-Timing header added by app.sqlstats.
+    """
+    return int(_QUERY_COUNT.search(response.headers['Server-Timing']).group(1))
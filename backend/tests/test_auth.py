@@ -0,0 +1,36 @@
+import pytest
+
+from app.extensions import db
+from app.models import User
+
+COMPANY = {'username': 'owner', 'password': 'owner-password', 'user_email': 'owner@example.com',
+           'name': 'Green Recyclers', 'email': 'info@green.example.com', 'phone': '0700000000'}
+
+
+@pytest.mark.parametrize('body', [
+    {'username': 123, 'email': 'a@example.com', 'password': 'password'},
+    {'username': 'someone', 'email': ['a@example.com'], 'password': 'password'},
+    {'username': 'someone', 'email': None, 'password': 'password'},
+    {'username': 'someone', 'email': 'a@example.com', 'password': {'plain': 'password'}},
+])
+def test_register_rejects_non_string_fields(client, body):
+    response = client.post('/api/auth/register', json=body)
+    assert response.status_code == 400
+    assert db.session.query(User).count() == 0
+
+
+@pytest.mark.parametrize('field, value', [
+    ('username', 123), ('user_email', True), ('name', ['Green']), ('email', {'a': 1}), ('phone', 700000000),
+    ('description', {'a': 1}),
+])
+def test_register_company_rejects_non_string_fields(client, field, value):
+    response = client.post('/api/auth/register-company', json=dict(COMPANY, **{field: value}))
+    assert response.status_code == 400
+
+
+def test_register_conflicts_ignore_case(client):
+    body = {'username': 'Someone', 'email': 'someone@example.com', 'password': 'password'}
+    assert client.post('/api/auth/register', json=body).status_code == 201
+    response = client.post('/api/auth/register', json=dict(body, username='someone', email='other@example.com'))
+    assert response.status_code == 409
+    assert response.get_json() == {'error': 'Username already exists'}
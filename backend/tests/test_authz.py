@@ -0,0 +1,77 @@
+import time
+
+from flask_jwt_extended import verify_jwt_in_request
+from sqlalchemy import event, select, update
+
+from app.authz import claims_version_name, create_user_token, load_current_user
+from app.caching import bump_version, get_versions
+from app.extensions import db
+from app.models import TableVersion, User
+
+
+def create_region(client, token, name):
+    return client.post('/api/regions/', json={'name': name}, headers={'Authorization': f'Bearer {token}'})
+
+
+def test_token_claims_authorize_until_the_user_changes(client, admin):
+    token = create_user_token(admin)
+    assert create_region(client, token, 'Nairobi').status_code == 201
+
+    admin.role = 'user'
+    db.session.commit()
+    # Every worker reads this version, not just the one that made the change
+    assert get_versions(claims_version_name(admin.id)) == [1]
+    assert create_region(client, token, 'Kisumu').status_code == 403
+
+
+def test_deleted_user_is_not_found(client, admin):
+    token = create_user_token(admin)
+    db.session.delete(admin)
+    db.session.commit()
+    assert create_region(client, token, 'Nairobi').status_code == 404
+
+
+def test_new_token_is_trusted_after_a_change(client, admin):
+    admin.username = 'root'
+    db.session.commit()
+    token = create_user_token(admin)
+    assert create_region(client, token, 'Nairobi').status_code == 201
+
+
+def test_cached_valid_token_needs_no_queries(app, admin):
+    headers = {'Authorization': f'Bearer {create_user_token(admin)}'}
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    for expected_queries in (1, 0, 0):
+        statements.clear()
+        with app.test_request_context(headers=headers):
+            verify_jwt_in_request()
+            user, error = load_current_user()
+        assert (user.role, error) == ('admin', None)
+        assert len(statements) == expected_queries
+
+
+def test_change_made_by_another_worker_applies_within_the_check_interval(app, client, admin):
+    app.config['AUTH_CLAIMS_CHECK_SECONDS'] = 0.2
+    token = create_user_token(admin)
+    assert create_region(client, token, 'Nairobi').status_code == 201
+
+    # What another worker's demotion leaves behind: this worker's caches are not told
+    db.session.execute(update(User).where(User.id == admin.id).values(role='user'))
+    bump_version(claims_version_name(admin.id))
+    db.session.commit()
+    assert create_region(client, token, 'Kisumu').status_code == 201
+    time.sleep(0.3)
+    assert create_region(client, token, 'Mombasa').status_code == 403
+
+
+def test_registration_writes_no_claims_version(client):
+    response = client.post('/api/auth/register-company', json={
+        'username': 'owner', 'password': 'owner-password', 'user_email': 'owner@example.com',
+        'name': 'Green Recyclers', 'email': 'info@green.example.com', 'phone': '0700000000',
+    })
+    assert response.status_code == 201
+    assert db.session.scalars(select(TableVersion.name).where(TableVersion.name.like('user_claims.%'))).all() == []
+    token = response.get_json()['access_token']
+    response = client.get('/api/companies/my-company', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
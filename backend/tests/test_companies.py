@@ -0,0 +1,31 @@
+# backend/tests/test_companies.py
+import pytest
+
+from conftest import query_count
+
+
+@pytest.mark.parametrize('url', [
+    '/api/companies/',
+    '/api/companies/?limit=50',
+    '/api/companies/?status=approved',
+    '/api/companies/?fields=id,name&include=services',
+])
+def test_list_query_count_does_not_grow_with_companies(client, add_companies, url):
+    add_companies(10)
+    small = client.get(url)
+    add_companies(90)
+    large = client.get(url)
+
+    assert small.status_code == large.status_code == 200
+    assert query_count(large) == query_count(small)
+
+
+def test_list_returns_services_region_and_creator(client, add_companies):
+    company = add_companies(3)[2]
+
+    body = client.get('/api/companies/').get_json()
+
+    listed = next(c for c in body if c['id'] == company.id)
+    assert [s['name'] for s in listed['services']] == ['Service 0', 'Service 1', 'Service 2']
+    assert listed['region'] == {'id': company.region_id, 'name': 'Region 2'}
+    assert listed['user_username'] == 'admin'
@@ -0,0 +1,58 @@
+from app.authz import create_user_token
+from app.geo import grid_indexes
+
+
+def test_grid_index_is_only_rebuilt_when_locations_change(client, admin):
+    headers = {'Authorization': f'Bearer {create_user_token(admin)}'}
+    response = client.post('/api/companies/', headers=headers, json={
+        'name': 'Green Recyclers', 'email': 'info@green.example.com', 'phone': '0700000000',
+        'status': 'approved', 'latitude': -1.29, 'longitude': 36.82,
+    })
+    company_id = response.get_json()['id']
+
+    def nearby():
+        response = client.get('/api/companies/nearby?lat=-1.29&lon=36.82&radius=5')
+        return [company['id'] for company in response.get_json()]
+
+    assert nearby() == [company_id]
+    index = grid_indexes.get()
+
+    client.put(f'/api/companies/{company_id}', headers=headers, json={'description': 'Plastics', 'latitude': -1.29,
+                                                                      'longitude': 36.82})
+    assert grid_indexes.get() is index
+
+    client.put(f'/api/companies/{company_id}', headers=headers, json={'latitude': -0.09, 'longitude': 34.77})
+    assert grid_indexes.get() is not index
+    assert nearby() == []
+
+    client.put(f'/api/companies/{company_id}/status', headers=headers, json={'status': 'rejected'})
+    response = client.get('/api/companies/nearby?lat=-0.09&lon=34.77&status=approved')
+    assert response.get_json() == []
+
+
+def test_nearby_matches_companies_by_their_service_area(client, admin):
+    headers = {'Authorization': f'Bearer {create_user_token(admin)}'}
+
+    def create(name, latitude, service_radius_km=None):
+        response = client.post('/api/companies/', headers=headers, json={
+            'name': name, 'email': f'{name.lower()}@example.com', 'phone': '0700000000', 'status': 'approved',
+            'latitude': latitude, 'longitude': 36.82, 'service_radius_km': service_radius_km,
+        })
+        return response.get_json()['id']
+
+    # About 30 km north of the resident, serving 50 km around its base
+    far_serving = create('Far', -1.02, service_radius_km=50)
+    # About 8 km away but only serving 5 km around it
+    near_not_serving = create('Near', -1.22, service_radius_km=5)
+    # About 8 km away, no service radius: matched within the requested radius
+    near_unknown = create('Unknown', -1.22)
+
+    response = client.get('/api/companies/nearby?lat=-1.29&lon=36.82')
+    results = response.get_json()
+    assert [company['id'] for company in results] == [near_unknown, far_serving]
+    assert [company['serves_location'] for company in results] == [None, True]
+    assert near_not_serving not in [company['id'] for company in results]
+
+    client.put(f'/api/companies/{far_serving}', headers=headers, json={'service_radius_km': 20})
+    response = client.get('/api/companies/nearby?lat=-1.29&lon=36.82')
+    assert [company['id'] for company in response.get_json()] == [near_unknown]
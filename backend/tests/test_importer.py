@@ -0,0 +1,46 @@
+import io
+import json
+
+from app.authz import create_user_token
+from app.importer import CompanyImporter
+from app.models import Company
+
+
+def ndjson(*records):
+    return io.BytesIO(''.join(json.dumps(record) + '\n' for record in records).encode())
+
+
+def company(number, **fields):
+    return dict({'name': f'Company {number}', 'email': f'company{number}@example.com', 'phone': '0700000000'}, **fields)
+
+
+def import_ndjson(client, admin, *records):
+    return client.post('/api/companies/import?format=ndjson', data=ndjson(*records),
+                       headers={'Authorization': f'Bearer {create_user_token(admin)}'})
+
+
+def test_non_string_fields_are_row_errors(client, admin):
+    response = import_ndjson(client, admin, company(1), company(2, description={'a': 1}),
+                             company(3, name=['Company 3']), company(4, phone=700000000))
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report['created'], report['failed']) == (2, 2)
+    assert [error['line'] for error in report['errors']] == [2, 3]
+    assert Company.query.filter_by(name='Company 4').one().phone == '700000000'
+
+
+def test_rows_the_database_rejects_are_row_errors(client, admin, monkeypatch):
+    validate = CompanyImporter._validate
+
+    def validate_without_text_checks(self, record):
+        values, service_ids = validate(self, {**record, 'description': None})
+        values['description'] = record.get('description')
+        return values, service_ids
+
+    # Stands in for any value the driver or database refuses once the insert runs
+    monkeypatch.setattr(CompanyImporter, '_validate', validate_without_text_checks)
+    response = import_ndjson(client, admin, company(1), company(2, description={'a': 1}), company(3))
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report['created'], report['failed']) == (2, 1)
+    assert report['errors'][0]['line'] == 2
@@ -0,0 +1,16 @@
+def test_metrics_are_not_served_without_a_token(app, client):
+    assert client.get('/metrics').status_code == 404
+
+
+def test_metrics_require_the_configured_token(app, client):
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert b'http_request_duration_seconds' in response.data
+
+
+def test_public_metrics_need_no_token(app, client):
+    app.config['METRICS_PUBLIC'] = True
+    assert client.get('/metrics').status_code == 200
@@ -0,0 +1,34 @@
+from flask_jwt_extended import create_access_token
+
+from app.authz import create_user_token
+from app.extensions import db
+from app.models import User
+
+
+def auth(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_token_with_a_non_integer_identity_is_unauthorized(client):
+    headers = auth(create_access_token(identity='not-a-number'))
+    for url in ('/api/notifications/', '/api/notifications/unread-count'):
+        assert client.get(url, headers=headers).status_code == 401
+    assert client.post('/api/notifications/read', json={'all': True}, headers=headers).status_code == 401
+
+
+def test_send_test_is_for_admins_only(client, admin):
+    user = User(username='resident', email='resident@example.com', role='user')
+    user.set_password('resident-password')
+    db.session.add(user)
+    db.session.commit()
+    response = client.post('/api/notifications/send-test', json={'message': 'Hi'}, headers=auth(create_user_token(user)))
+    assert response.status_code == 403
+
+    headers = auth(create_user_token(admin))
+    assert client.post('/api/notifications/send-test', json={'message': 'Hi'}, headers=headers).status_code == 200
+    page = client.get('/api/notifications/', headers=headers).get_json()
+    assert [n['message'] for n in page['notifications']] == ['Hi']
+    assert page['unread_count'] == 1
+
+    response = client.post('/api/notifications/read', json={'all': True}, headers=headers)
+    assert response.get_json() == {'marked': 1, 'unread_count': 0}
@@ -0,0 +1,36 @@
+from sqlalchemy import text
+
+from app import search
+from app.authz import create_user_token
+from app.extensions import db
+
+
+def create_company(client, admin, name, description):
+    return client.post('/api/companies/', headers={'Authorization': f'Bearer {create_user_token(admin)}'},
+                       json={'name': name, 'email': f'{name.lower()}@example.com', 'phone': '0700000000',
+                             'description': description, 'status': 'approved'})
+
+
+def search_names(client, q):
+    return [company['name'] for company in client.get(f'/api/companies/search?q={q}').get_json()]
+
+
+def test_search_is_ranked_by_field(client, admin):
+    create_company(client, admin, 'Plastics', 'Collects bottles')
+    create_company(client, admin, 'Bottles', 'Collects plastics')
+    assert search_names(client, 'plast') == ['Plastics', 'Bottles']
+
+
+def test_missing_index_is_not_created_by_requests(app, client, admin):
+    db.session.execute(text('DROP TABLE companies_fts'))
+    db.session.commit()
+    search._index_ready.clear()
+
+    # Writes still succeed and search falls back to substring matching
+    assert create_company(client, admin, 'Plastics', 'Collects bottles').status_code == 201
+    assert search_names(client, 'bottles') == ['Plastics']
+    assert db.session.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'companies_fts'")).first() is None
+
+    result = app.test_cli_runner().invoke(args=['search-reindex'])
+    assert 'rebuilt' in result.output
+    assert search_names(client, 'plast') == ['Plastics']
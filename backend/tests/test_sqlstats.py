@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+from flask import jsonify
+
+from app.authz import create_user_token
+from app.extensions import db
+from app.models import Region
+from app.sqlstats import QueryBudgetExceeded, query_budget
+from conftest import query_count
+
+
+@pytest.mark.parametrize('url, budget', [
+    ('/api/companies/', 3),
+    ('/api/companies/?status=approved&region_id=1', 3),
+    ('/api/companies/1', 2),
+    ('/api/companies/facets', 2),
+    ('/api/companies/search?q=company', 4),
+    ('/api/regions/1/services/1/companies', 4),
+])
+def test_budgeted_endpoints_stay_within_budget(client, add_companies, url, budget):
+    add_companies(20)
+    # Under app.testing an endpoint over its budget raises QueryBudgetExceeded here
+    response = client.get(url)
+    assert response.status_code == 200
+    assert query_count(response) <= budget
+
+
+@pytest.mark.parametrize('url, budget', [('/api/notifications/', 4), ('/api/notifications/unread-count', 3)])
+def test_budgeted_notification_endpoints_stay_within_budget(client, admin, url, budget):
+    response = client.get(url, headers={'Authorization': f'Bearer {create_user_token(admin)}'})
+    assert response.status_code == 200
+    assert query_count(response) <= budget
+
+
+@pytest.fixture
+def over_budget(app):
+    @app.route('/over-budget')
+    @query_budget(1)
+    def over_budget():
+        return jsonify([region.name for region in db.session.scalars(db.select(Region))] +
+                       [region.name for region in db.session.scalars(db.select(Region))])
+    return '/over-budget'
+
+
+def test_going_over_the_budget_raises_under_testing(client, over_budget):
+    with pytest.raises(QueryBudgetExceeded, match='issued 2 queries, over its budget of 1'):
+        client.get(over_budget)
+
+
+def test_going_over_the_budget_logs_outside_testing(app, client, over_budget, caplog):
+    app.testing = False
+    with caplog.at_level(logging.WARNING, logger='app.sqlstats'):
+        response = client.get(over_budget)
+    assert response.status_code == 200
+    assert 'over its budget of 1' in caplog.text
@@ -0,0 +1,35 @@
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+
+from app.extensions import db
+from app.models import Company
+from app.warmup import warm_up
+
+
+def requests_recorded():
+    return sum(sample.value for metric in REGISTRY.collect() if metric.name == 'http_request_duration_seconds'
+               for sample in metric.samples if sample.name.endswith('_count'))
+
+
+def test_warm_up_leaves_nothing_to_compile_for_the_warm_paths(app, client, add_companies):
+    add_companies(3)
+    # In-memory SQLite lives as long as its connection, so keep it; gunicorn's warm-up disposes
+    warm_up(app, dispose=False)
+    assert Company.__mapper__.configured
+
+    cache_misses = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if context.cache_hit != CacheStats.CACHE_HIT:
+            cache_misses.append(statement)
+    event.listen(db.engine, 'after_cursor_execute', record)
+    for path in app.config['WARMUP_PATHS']:
+        assert client.get(path).status_code < 500
+    assert cache_misses == []
+
+
+def test_warm_up_requests_are_not_recorded_as_traffic(app):
+    before = requests_recorded()
+    warm_up(app, dispose=False)
+    assert requests_recorded() == before